@@ -0,0 +1,44 @@
+"""
+Run the backend with `python -m backend` (the Electron dev entry point).
+
+The app is imported here as backend.app rather than run as __main__, so it
+is only ever loaded once per process: asgi.py imports backend.app too, and
+multiprocessing's spawn start method skips a __main__ that is a package's
+__main__ module, so the yt-dlp workers don't load the app at all.
+"""
+import os
+
+from .app import app, start_background_init, SERVER_THREADS
+
+
+def main(host='127.0.0.1', port=8000):
+    start_background_init()
+    # Prefer the ASGI stack (async API routes under uvicorn) unless
+    # HEIMDALL_SERVER=waitress; fall back to waitress if it isn't installed.
+    if os.getenv('HEIMDALL_SERVER', 'asgi') != 'waitress':
+        try:
+            from .asgi import serve as serve_asgi
+        except ImportError as e:
+            print(f'ASGI stack not available ({e}), using waitress')
+        else:
+            print(f'Starting uvicorn (ASGI) server on {host}:{port}')
+            serve_asgi(host=host, port=port)
+            return
+
+    # Prefer waitress for a stable single-process server (no reloader).
+    try:
+        from waitress import serve
+    except ImportError:
+        # Fall back to Flask dev server if waitress isn't available.
+        print('Waitress not available, starting Flask dev server (debug=False)')
+        app.run(host=host, port=port, debug=False)
+        return
+    print(f'Starting waitress server on {host}:{port}')
+    serve(app, host=host, port=port, threads=SERVER_THREADS)
+
+
+if __name__ == '__main__':
+    # Needed for the yt-dlp worker processes in a frozen build
+    import multiprocessing
+    multiprocessing.freeze_support()
+    main()
@@ -1,12 +1,25 @@
 # backend/app.py
-from flask import Flask, render_template, send_from_directory, request, jsonify, redirect, session, abort
+if __name__ == '__main__':
+    # `python -m backend.app` would load this file twice (as __main__, and as
+    # backend.app when asgi.py imports it) and make spawned yt-dlp workers
+    # re-run it as __mp_main__. Hand off to the package entry point instead;
+    # alter_sys makes it the __main__ that spawn sees (and skips).
+    import runpy
+    runpy.run_module('backend', run_name='__main__', alter_sys=True)
+    raise SystemExit(0)
+
+# Time this module's imports and init steps (see startup.py)
+from . import startup
+startup.track_imports()
+
+from flask import Flask, render_template, request, jsonify, redirect, session, abort, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
-import requests
+import json
+import time
+import threading
 import dotenv
-import asyncio
-import yt_dlp
 
 dotenv.load_dotenv()
 
@@ -32,35 +45,81 @@ CORS(app)
 # Defer secret key setup until after the User model determines the data dir
 app.secret_key = None
 TMDB_API_KEY = os.getenv('TMDB_API_KEY')
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+# Overridable so the backend can be pointed at a local fake TMDB server
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', "https://api.themoviedb.org/3")
+
+# API responses are either revalidated (ETag + If-None-Match -> 304, and
+# compressed above a size threshold) or, for private/volatile routes, never
+# stored. See conditional.py; asgi.py applies the same rules.
+from .conditional import (
+    cache_policy, body_etag, etag_matches, encoded_etag, choose_encoding,
+    compress, NO_STORE, stats as conditional_stats,
+)
 
-# Add Cache-Control headers to prevent browser caching of API responses
 @app.after_request
 def add_cache_control_headers(response):
-    """Prevent browser caching of API responses to avoid stale data"""
+    """Conditional GET, compression and Cache-Control for API responses"""
     # Only apply to API routes, not static files
-    if request.path.startswith('/api/'):
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    if not request.path.startswith('/api/'):
+        return response
+
+    policy = cache_policy(request.method, request.path, response.status_code)
+    if policy == NO_STORE or response.is_streamed or response.direct_passthrough:
+        response.headers['Cache-Control'] = NO_STORE
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
+        return response
+
+    response.headers['Cache-Control'] = policy
+    response.vary.add('Accept-Encoding')
+    if response.status_code == 304:
+        return response
+
+    # Routes may set a cheaper version-based ETag; otherwise hash the body
+    etag, _ = response.get_etag()
+    body = response.get_data()
+    if etag is None:
+        etag = body_etag(body)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response.status_code = 304
+        response.set_data(b'')
+        response.set_etag(etag)
+        return response
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), response.mimetype, len(body))
+    if encoding:
+        response.set_data(compress(body, encoding, etag))
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(encoded_etag(etag, encoding))
     return response
 
-# Initialize the User model
-from .models.user import User
-user_model = User()
+# Initialize the User model. Legacy profile migration runs later, with the
+# other deferred init (see init_data_layer).
+from .models.user import User, PasswordWorkersBusy, password_hasher
+with startup.phase('user_model'):
+    user_model = User(migrate=False)
+
+# Request threads of the WSGI server (waitress, or the a2wsgi bridge under
+# uvicorn). Password hashing is admitted only while some stay free.
+SERVER_THREADS = int(os.getenv('HEIMDALL_WSGI_THREADS', '8'))
+password_hasher.fit_to_server(SERVER_THREADS)
 print(f"Heimdall data dir: {getattr(user_model, 'app_data_dir', 'unknown')}")
 print(f"User file: {user_model.file_path}")
-print(f"Profiles file: {user_model.profiles_path}")
-
-# Ensure the Flask secret key is set. Prefer the FLASK_SECRET_KEY env var
-# (useful for CI / signed builds). If not provided, store a persistent
-# secret in the app data dir so sessions survive restarts for the installed app.
-try:
-    env_key = os.getenv('FLASK_SECRET_KEY')
-    if env_key:
-        app.secret_key = env_key
-    else:
-        secret_path = os.path.join(getattr(user_model, 'app_data_dir', DATA_DIR), 'flask_secret.key')
+print(f"Profiles dir: {user_model.profiles_path}")
+
+def init_secret_key():
+    """
+    Ensure the Flask secret key is set. Prefer the FLASK_SECRET_KEY env var
+    (useful for CI / signed builds). If not provided, store a persistent
+    secret in the app data dir so sessions survive restarts for the installed app.
+    """
+    try:
+        env_key = os.getenv('FLASK_SECRET_KEY')
+        if env_key:
+            app.secret_key = env_key
+            return
+        # user_model.app_data_dir is always set; DATA_DIR isn't defined yet here
+        secret_path = os.path.join(user_model.app_data_dir, 'flask_secret.key')
         if os.path.exists(secret_path):
             try:
                 with open(secret_path, 'rb') as sf:
@@ -77,9 +136,14 @@ try:
                 app.secret_key = new_key
             except Exception:
                 app.secret_key = os.urandom(32)
-except Exception as e:
-    print('Failed to initialize Flask secret key:', e)
-    app.secret_key = os.urandom(32)
+    except Exception as e:
+        print('Failed to initialize Flask secret key:', e)
+        app.secret_key = os.urandom(32)
+
+# Sessions (including the ASGI layer's cookie check) need this before the
+# first request, so it stays on the startup path; it is a single small read
+with startup.phase('secret_key'):
+    init_secret_key()
 
 # ...
 @app.route('/')
@@ -97,6 +161,13 @@ def login_page():
 def signup_page():
     return render_template('signup.html')
 
+def server_busy_response(retry_after=1):
+    """503 telling the client to retry shortly (e.g. password pool full)."""
+    response = jsonify({'message': 'Server busy, please try again'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
 @app.route('/api/login', methods=['POST'])
 def login():
     try:
@@ -126,6 +197,8 @@ def login():
             session['username'] = username
             return jsonify({'message': 'Login successful'}), 200
         return jsonify({'message': 'Invalid credentials'}), 401
+    except PasswordWorkersBusy:
+        return server_busy_response()
     except Exception as e:
         # Write traceback to debug log for installed apps
         import traceback
@@ -160,6 +233,8 @@ def signup():
             session['username'] = username
             return jsonify({'message': message}), 200
         return jsonify({'message': message}), 400
+    except PasswordWorkersBusy:
+        return server_busy_response()
     except Exception as e:
         import traceback
         tb = traceback.format_exc()
@@ -239,68 +314,334 @@ def details_page(media_type, tmdb_id):
     # Just render the template. JS will fetch the data.
     return render_template('details.html', media_type=media_type, tmdb_id=tmdb_id)
 
+# --- TMDB response cache ---
+from .cache import ResponseCache, MISSING
+from . import http_client
+from .http_client import http
+from .fanout import fan_out, race, run_in_background
+from .singleflight import SingleFlight
+from .refresher import CatalogRefresher
+
+# Per-endpoint TTLs in seconds, first matching prefix wins. Catalog lists move
+# slowly, genre lists almost never change and details are stable for hours.
+TMDB_CACHE_TTLS = [
+    ('/trending/', 10 * 60),
+    ('/movie/popular', 15 * 60),
+    ('/movie/top_rated', 15 * 60),
+    ('/tv/popular', 15 * 60),
+    ('/tv/top_rated', 15 * 60),
+    ('/genre/', 3 * 24 * 60 * 60),
+    ('/discover/', 15 * 60),
+    ('/search/', 10 * 60),
+    ('/movie/', 6 * 60 * 60),
+    ('/tv/', 6 * 60 * 60),
+]
+TMDB_CACHE_DEFAULT_TTL = 10 * 60
+
+# HEIMDALL_TMDB_CACHE_MB=0 disables the cache entirely
+tmdb_cache = ResponseCache(
+    max_bytes=int(float(os.getenv('HEIMDALL_TMDB_CACHE_MB', '32')) * 1024 * 1024),
+    default_ttl=TMDB_CACHE_DEFAULT_TTL,
+    name='tmdb',
+)
+tmdb_flight = SingleFlight(name='tmdb')
+
+def tmdb_cache_ttl(endpoint):
+    for prefix, ttl in TMDB_CACHE_TTLS:
+        if endpoint.startswith(prefix):
+            return ttl
+    return TMDB_CACHE_DEFAULT_TTL
+
+def tmdb_cache_key(endpoint, params):
+    """Cache key from the endpoint and its params, ignoring the API key and
+    param order so equivalent requests share an entry."""
+    normalized = tuple(sorted(
+        (str(k), str(v)) for k, v in params.items() if k != 'api_key'
+    ))
+    return (endpoint, normalized)
+
+def tmdb_request(endpoint, extra_params={}):
+    """(full_url, params, cache_key) for a TMDB call. Shared with the async
+    layer in asgi.py so both hit the same cache entries."""
+    full_url = f"{TMDB_BASE_URL}{endpoint}"
+    params = {'api_key': TMDB_API_KEY, 'language': 'en-US'}
+    params.update(extra_params)
+    return full_url, params, tmdb_cache_key(endpoint, params)
+
 def fetch_tmdb(endpoint, extra_params={}):
     """
-    Helper function to fetch data from TMDB API
+    Helper function to fetch data from TMDB API.
+    Successful responses are cached in tmdb_cache for a per-endpoint TTL.
     """
     if not TMDB_API_KEY:
         abort(500, "TMDB API key not configured")
 
-    full_url = f"{TMDB_BASE_URL}{endpoint}"
-    params = {'api_key': TMDB_API_KEY, 'language': 'en-US'}
-    params.update(extra_params)
+    full_url, params, cache_key = tmdb_request(endpoint, extra_params)
+    cached = tmdb_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
+    # Concurrent misses for the same key share one upstream request
+    return tmdb_flight.do(cache_key, lambda: _fetch_tmdb_upstream(endpoint, full_url, params, cache_key))
 
+def refresh_tmdb(endpoint, extra_params={}):
+    """Like fetch_tmdb but always goes upstream, updating the cache."""
+    if not TMDB_API_KEY:
+        abort(500, "TMDB API key not configured")
+
+    full_url, params, cache_key = tmdb_request(endpoint, extra_params)
+    return tmdb_flight.do(cache_key, lambda: _fetch_tmdb_upstream(endpoint, full_url, params, cache_key))
+
+def _fetch_tmdb_upstream(endpoint, full_url, params, cache_key, cache=None):
+    """GET from TMDB and store the result in tmdb_cache, or in cache (with
+    its own default TTL) when given."""
     try:
-        response = requests.get(full_url, params=params)
+        response = http.get(full_url, params=params)
         response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        data = response.json()
+    except http_client.RequestException as e:
         print(f"Error fetching data from TMDB: {str(e)}")
         abort(500, f"Error fetching data from TMDB: {str(e)}")
 
+    if cache is None:
+        tmdb_cache.set(cache_key, data, ttl=tmdb_cache_ttl(endpoint), size=len(response.content))
+    else:
+        cache.set(cache_key, data, size=len(response.content))
+    title_index.add_results(endpoint, data)
+    return data
+
+def seed_tmdb_cache(endpoint, data, extra_params={}):
+    """Store data as if fetch_tmdb(endpoint, extra_params) had returned it,
+    e.g. for sub-resources that arrived embedded in another response."""
+    _, _, cache_key = tmdb_request(endpoint, extra_params)
+    tmdb_cache.set(cache_key, data, ttl=tmdb_cache_ttl(endpoint))
+
+def split_appended(data, append):
+    """Split append_to_response sub-resources out of a TMDB response,
+    without mutating the (cached) original. Returns (main, parts)."""
+    main = {k: v for k, v in data.items() if k not in append}
+    parts = {name: data.get(name) for name in append}
+    return main, parts
+
+def fetch_tmdb_composite(endpoint, append=(), related=None, extra_params={}):
+    """
+    Fetch a TMDB resource together with its sub-resources in as few round
+    trips as possible.
+
+    append: sub-resources TMDB can embed via append_to_response (e.g.
+        'recommendations', 'credits'). They are folded into the main call.
+    related: dict of name -> (endpoint, params) for independent fetches that
+        can't be appended; these run concurrently with the main call.
+
+    Returns (main, parts) where parts maps each appended/related name to its
+    data. Errors from the main call propagate; a failed related fetch is
+    reported as None in parts.
+    """
+    params = dict(extra_params)
+    if append:
+        params['append_to_response'] = ','.join(append)
+
+    calls = {'__main__': lambda: fetch_tmdb(endpoint, params)}
+    for name, (rel_endpoint, rel_params) in (related or {}).items():
+        calls[name] = lambda e=rel_endpoint, p=rel_params: fetch_tmdb(e, p or {})
+
+    results, errors = fan_out(calls)
+    if '__main__' in errors:
+        raise errors['__main__']
+
+    main, parts = split_appended(results['__main__'], append)
+    for name in (related or {}):
+        if name in errors:
+            print(f"Error fetching related resource {name}: {errors[name]}")
+        parts[name] = results.get(name)
+    return main, parts
+
+# --- Catalog refresher (stale-while-revalidate) ---
+# Catalog and genre lists are kept warm by a background thread and always
+# served from the last good copy. HEIMDALL_REFRESH_INTERVAL=0 turns this off.
+CATALOG_REFRESH_ENDPOINTS = [
+    '/trending/movie/week',
+    '/trending/tv/week',
+    '/movie/popular',
+    '/movie/top_rated',
+    '/tv/popular',
+    '/tv/top_rated',
+    '/genre/movie/list',
+    '/genre/tv/list',
+]
+_refresh_endpoints_env = os.getenv('HEIMDALL_REFRESH_ENDPOINTS')
+if _refresh_endpoints_env is not None:
+    CATALOG_REFRESH_ENDPOINTS = [e.strip() for e in _refresh_endpoints_env.split(',') if e.strip()]
+
+catalog_refresher = CatalogRefresher(
+    fetch=refresh_tmdb,
+    endpoints=CATALOG_REFRESH_ENDPOINTS,
+    interval=float(os.getenv('HEIMDALL_REFRESH_INTERVAL', '600')),
+    name='catalog-refresher',
+)
+
+def fetch_catalog(endpoint):
+    """
+    fetch_tmdb for catalog lists. Warmed endpoints are served from the
+    refresher's last good copy. Returns (data, stale_seconds).
+    """
+    if catalog_refresher.handles(endpoint):
+        return catalog_refresher.get(endpoint)
+    return fetch_tmdb(endpoint), 0
+
+def mark_stale(response, stale_seconds):
+    """Flag a response built from a copy past its refresh interval."""
+    if stale_seconds:
+        response.headers['Age'] = str(stale_seconds)
+        response.headers['X-Heimdall-Stale'] = str(stale_seconds)
+    return response
+
+@app.route('/api/stats')
+def get_stats():
+    """Internal cache counters, useful when tuning TTLs and sizes."""
+    if 'username' not in session:
+        return jsonify({'message': 'Not logged in'}), 401
+    return jsonify({
+        'tmdb_cache': tmdb_cache.stats(),
+        'tmdb_singleflight': tmdb_flight.stats(),
+        'catalog_refresher': catalog_refresher.stats(),
+        'music_stream_singleflight': music_stream_flight.stats(),
+        'music_stream_cache': stream_cache.stats(),
+        'music_search_cache': music_search_cache.stats(),
+        'music_search_singleflight': music_search_flight.stats(),
+        'ytdlp_pool': extractor_pool.stats(),
+        'audio_cache': audio_cache.stats(),
+        'lyrics_cache': lyrics_cache.stats(),
+        'image_cache': image_cache.stats(),
+        'image_singleflight': image_flight.stats(),
+        'api_compressed_cache': conditional_stats(),
+        'static_assets': static_assets.stats(),
+        'title_index': title_index.stats(),
+        'discover_prefetch': discover_prefetcher.stats(),
+        'startup': startup.report(),
+        **_asgi_stats(),
+    })
+
+def _asgi_stats():
+    # Only present when serving through asgi.py
+    asgi = sys.modules.get(f'{__package__}.asgi')
+    if asgi is None:
+        return {}
+    return {
+        'async_tmdb_singleflight': asgi.tmdb_flight.stats(),
+        'async_music_search_singleflight': asgi.music_search_flight.stats(),
+        'async_music_stream_singleflight': asgi.music_stream_flight.stats(),
+    }
+
 # --- Movie API Routes ---
 @app.route('/api/movies/popular')
 def get_popular_movies():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/movie/popular')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/movie/popular')
+    return mark_stale(jsonify(data.get('results', [])), stale)
 
 @app.route('/api/movies/trending')
 def get_trending_movies():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/trending/movie/week')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/trending/movie/week')
+    return mark_stale(jsonify(data.get('results', [])), stale)
 
 @app.route('/api/movies/top-rated')
 def get_top_rated_movies():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/movie/top_rated')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/movie/top_rated')
+    return mark_stale(jsonify(data.get('results', [])), stale)
 
 # --- NEW: TV Show API Routes ---
 @app.route('/api/tv/popular')
 def get_popular_tv():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/tv/popular')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/tv/popular')
+    return mark_stale(jsonify(data.get('results', [])), stale)
 
 @app.route('/api/tv/trending')
 def get_trending_tv():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/trending/tv/week')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/trending/tv/week')
+    return mark_stale(jsonify(data.get('results', [])), stale)
 
 @app.route('/api/tv/top-rated')
 def get_top_rated_tv():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
-    data = fetch_tmdb('/tv/top_rated')
-    return jsonify(data.get('results', []))
+    data, stale = fetch_catalog('/tv/top_rated')
+    return mark_stale(jsonify(data.get('results', [])), stale)
+
+# --- Aggregated home page ---
+# Row name -> TMDB endpoint. Names match the carousel ids in index.html.
+HOME_ROWS = {
+    'trending-movies': '/trending/movie/week',
+    'trending-tv': '/trending/tv/week',
+    'top-rated-movies': '/movie/top_rated',
+    'top-rated-tv': '/tv/top_rated',
+    'popular-movies': '/movie/popular',
+    'popular-tv': '/tv/popular',
+}
+
+# Only the fields the carousels and hero section actually use
+HOME_ITEM_FIELDS = ('id', 'title', 'name', 'poster_path', 'backdrop_path', 'overview', 'media_type')
+
+# Seconds to wait for all rows before returning whatever is ready
+HOME_ROW_TIMEOUT = float(os.getenv('HEIMDALL_HOME_TIMEOUT', '4'))
+
+@app.route('/api/home')
+def get_home():
+    """
+    Returns every home page carousel in one response. Rows are fetched
+    concurrently; rows that fail or miss the deadline are listed under
+    'missing' so the client can fall back to the per-row endpoints.
+    Optional ?rows=trending-movies,popular-tv selects a subset.
+    """
+    if 'username' not in session:
+        return jsonify({'message': 'Not logged in'}), 401
+
+    names, unknown = home_row_names(request.args.get('rows'))
+    if unknown:
+        return jsonify({'message': f"Unknown rows: {', '.join(unknown)}"}), 400
+
+    calls = {name: (lambda e=HOME_ROWS[name]: fetch_catalog(e)) for name in names}
+    results, errors = fan_out(calls, timeout=HOME_ROW_TIMEOUT)
+
+    payload, stale = home_payload(names, results, errors)
+    return mark_stale(jsonify(payload), stale)
+
+def home_row_names(requested):
+    """Rows selected by ?rows= (all by default). Returns (names, unknown)."""
+    if not requested:
+        return list(HOME_ROWS), []
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    return names, [name for name in names if name not in HOME_ROWS]
+
+def home_payload(names, results, errors):
+    """Build the /api/home body from fetch_catalog results per row name.
+    Returns (payload, stale_seconds of the stalest row)."""
+    rows = {}
+    stale = 0
+    for name in names:
+        if name in results:
+            data, row_stale = results[name]
+            stale = max(stale, row_stale)
+            rows[name] = [
+                {k: item[k] for k in HOME_ITEM_FIELDS if item.get(k) is not None}
+                for item in data.get('results', [])
+            ]
+        else:
+            print(f"Home row {name} unavailable: {errors.get(name)}")
+
+    return {
+        'rows': rows,
+        'missing': [name for name in names if name not in rows],
+    }, stale
 
 @app.route('/api/genres/<media_type>')
 def get_genres(media_type):
@@ -313,8 +654,8 @@ def get_genres(media_type):
     if media_type not in ['movie', 'tv']:
         return jsonify({'message': 'Invalid media type'}), 400
     
-    data = fetch_tmdb(f'/genre/{media_type}/list')
-    return jsonify(data.get('genres', []))
+    data, stale = fetch_catalog(f'/genre/{media_type}/list')
+    return mark_stale(jsonify(data.get('genres', [])), stale)
 
 @app.route('/api/discover')
 def discover_media():
@@ -324,12 +665,66 @@ def discover_media():
     if 'username' not in session:
         return jsonify({'message': 'Not logged in'}), 401
 
+    endpoint, params = discover_request(request.args)
+    data = fetch_discover(endpoint, params)
+    return jsonify(discover_payload(data))
+
+# Next discover pages are fetched ahead into a short-lived cache (see
+# prefetcher.py). HEIMDALL_DISCOVER_PREFETCH=0 turns this off.
+from .prefetcher import PagePrefetcher
+discover_prefetcher = PagePrefetcher(
+    key=lambda endpoint, params: tmdb_request(endpoint, params)[2],
+    depth=int(os.getenv('HEIMDALL_DISCOVER_PREFETCH', '2')),
+    ttl=float(os.getenv('HEIMDALL_DISCOVER_PREFETCH_TTL', '120')),
+    max_inflight=int(os.getenv('HEIMDALL_DISCOVER_PREFETCH_MAX_INFLIGHT', '4')),
+    name='discover_prefetch',
+)
+
+def take_prefetched(endpoint, params):
+    """A prefetched discover page, promoted into tmdb_cache, or MISSING."""
+    data = discover_prefetcher.take(endpoint, params)
+    if data is not MISSING:
+        _, _, cache_key = tmdb_request(endpoint, params)
+        tmdb_cache.set(cache_key, data, ttl=tmdb_cache_ttl(endpoint))
+    return data
+
+def plan_prefetch(endpoint, params, data, hit):
+    """Reserve the discover pages to fetch ahead of this one."""
+    return discover_prefetcher.plan(endpoint, params, data, hit, is_cached=tmdb_cache.contains)
+
+def fetch_discover(endpoint, params):
+    """fetch_tmdb for a discover page, then prefetch the next ones."""
+    data = take_prefetched(endpoint, params)
+    hit = data is not MISSING
+    if not hit:
+        data = fetch_tmdb(endpoint, extra_params=params)
+    if TMDB_API_KEY:
+        for page_params in plan_prefetch(endpoint, params, data, hit):
+            run_in_background(prefetch_discover_page, endpoint, page_params)
+    return data
+
+def prefetch_discover_page(endpoint, params):
+    full_url, params_full, cache_key = tmdb_request(endpoint, params)
+    failed = True
+    try:
+        # Shares the flight with a real request for the same page
+        tmdb_flight.do(cache_key, lambda: _fetch_tmdb_upstream(
+            endpoint, full_url, params_full, cache_key, cache=discover_prefetcher.cache,
+        ))
+        failed = False
+    except Exception as e:
+        print(f"Discover prefetch failed for {endpoint} page {params.get('page')}: {e}")
+    finally:
+        discover_prefetcher.done(endpoint, params, failed=failed)
+
+def discover_request(args):
+    """TMDB (endpoint, params) for the /api/discover query args."""
     # Get filter parameters from the request
-    media_type = request.args.get('type', 'movie') # Default to movie
-    genre = request.args.get('genre')
-    year = request.args.get('year')
-    sort_by = request.args.get('sort', 'popularity.desc')
-    page = request.args.get('page', '1') # Support pagination
+    media_type = args.get('type', 'movie') # Default to movie
+    genre = args.get('genre')
+    year = args.get('year')
+    sort_by = args.get('sort', 'popularity.desc')
+    page = args.get('page', '1') # Support pagination
 
     # Build the endpoint and query parameters
     endpoint = f'/discover/{media_type}'
@@ -347,13 +742,15 @@ def discover_media():
     elif media_type == 'tv' and year:
         params['first_air_date_year'] = year
 
-    data = fetch_tmdb(endpoint, extra_params=params)
+    return endpoint, params
+
+def discover_payload(data):
     # Return both results and pagination info
-    return jsonify({
+    return {
         'results': data.get('results', []),
         'page': data.get('page', 1),
         'total_pages': data.get('total_pages', 1)
-    })
+    }
 
 @app.route('/api/search')
 def search_media():
@@ -365,14 +762,40 @@ def search_media():
     if not query or len(query) < 2:
         return jsonify([])
 
+    # Taken before the upstream call indexes its own results, so this
+    # matches what /api/search/suggest showed
+    local = title_index.search(query, limit=SEARCH_SUGGEST_LIMIT)
     data = fetch_tmdb('/search/multi', {'query': query, 'include_adult': 'false'})
-    
-    filtered_results = [
+    return jsonify(merge_search_results(local, data))
+
+@app.route('/api/search/suggest')
+def suggest_media():
+    """Instant typeahead from titles already seen in TMDB responses; the
+    full /api/search result follows and keeps these at the top."""
+    if 'username' not in session:
+        return jsonify({'message': 'Not logged in'}), 401
+
+    query = request.args.get('q')
+    if not query or len(query) < 2:
+        return jsonify([])
+    return jsonify(title_index.search(query, limit=SEARCH_SUGGEST_LIMIT))
+
+def filter_search_results(data):
+    """Movies and shows with a poster, from a /search/multi response."""
+    return [
         item for item in data.get('results', [])
         if item.get('media_type') in ['movie', 'tv'] and item.get('poster_path')
     ]
 
-    return jsonify(filtered_results)
+def merge_search_results(local, data):
+    """Local suggestions first (so what the user already sees doesn't move),
+    then the upstream matches they didn't include."""
+    seen = {(item['media_type'], item['id']) for item in local}
+    merged = list(local)
+    for item in filter_search_results(data):
+        if (item['media_type'], item['id']) not in seen:
+            merged.append(item)
+    return merged[:SEARCH_RESULT_LIMIT]
 
 @app.route('/api/details/<media_type>/<int:tmdb_id>')
 def get_details(media_type, tmdb_id):
@@ -383,24 +806,34 @@ def get_details(media_type, tmdb_id):
         return jsonify({'message': 'Invalid media type'}), 400
 
     try:
-        # Fetch main details
-        details_data = fetch_tmdb(f'/{media_type}/{tmdb_id}')
-        
-        # Fetch recommendations
-        recommendations_data = fetch_tmdb(f'/{media_type}/{tmdb_id}/recommendations')
-
-        # Combine and send
-        combined_data = {
-            'details': details_data,
-            'recommendations': recommendations_data.get('results', [])
-        }
-        return jsonify(combined_data)
+        endpoint, append = details_request(media_type, tmdb_id)
+        details_data, parts = fetch_tmdb_composite(endpoint, append=append)
+        return jsonify(details_payload(tmdb_id, details_data, parts))
 
     except Exception as e:
         # This will catch 404s from fetch_tmdb if the ID is invalid
         print(f"Error in get_details: {e}")
         abort(500, "Error fetching details from provider.")
 
+def details_request(media_type, tmdb_id):
+    """(endpoint, append_to_response parts) for /api/details."""
+    # Recommendations (and for TV the first season, which details.js
+    # requests right after) are folded into one call via append_to_response
+    append = ('recommendations',)
+    if media_type == 'tv':
+        append += ('season/1',)
+    return f'/{media_type}/{tmdb_id}', append
+
+def details_payload(tmdb_id, details_data, parts):
+    if parts.get('season/1'):
+        seed_tmdb_cache(f'/tv/{tmdb_id}/season/1', parts['season/1'])
+
+    # Combine and send
+    return {
+        'details': details_data,
+        'recommendations': (parts.get('recommendations') or {}).get('results', [])
+    }
+
 @app.route('/api/tv/<int:tv_id>/season/<int:season_number>')
 def get_season_details(tv_id, season_number):
     if 'username' not in session:
@@ -440,20 +873,35 @@ def watch_tv(tmdb_id, season_num, episode_num):
                            season_num=season_num, 
                            episode_num=episode_num)
 
+# Static files are served from memory under content-hashed names (see
+# static_assets.py); templates link them through asset_url().
+from .static_assets import StaticAssets
+static_assets = StaticAssets(
+    FRONTEND_DIR,
+    max_bytes=int(float(os.getenv('HEIMDALL_STATIC_CACHE_MB', '32')) * 1024 * 1024),
+    reload=os.getenv('HEIMDALL_STATIC_RELOAD') == '1',
+)
+app.jinja_env.globals['asset_url'] = static_assets.url
+
+def _static_response(subdir, filename):
+    response = static_assets.response(subdir, filename, request, Response)
+    if response is None:
+        abort(404)
+    return response
+
 @app.route('/js/<path:filename>')
 def serve_js(filename):
-    return send_from_directory(os.path.join(project_root, 'frontend', 'js'), filename)
+    return _static_response('js', filename)
 
 @app.route('/css/<path:filename>')
 def serve_css(filename):
-    return send_from_directory(os.path.join(project_root, 'frontend', 'css'), filename)
+    return _static_response('css', filename)
 
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
-    return send_from_directory(os.path.join(project_root, 'frontend', 'assets'), filename)
+    return _static_response('assets', filename)
 
 # --- Watchlist Routes ---
-import json
 
 # Choose data directory (portable-first): prefer exe folder when frozen and writable,
 # otherwise fall back to per-user AppData. This mirrors the logic in models.user.
@@ -477,6 +925,18 @@ def choose_data_dir():
 DATA_DIR = choose_data_dir()
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Titles seen in TMDB responses, for instant search suggestions
+from .title_index import TitleIndex
+import atexit
+SEARCH_SUGGEST_LIMIT = int(os.getenv('HEIMDALL_SEARCH_SUGGEST_LIMIT', '6'))
+SEARCH_RESULT_LIMIT = 20
+title_index = TitleIndex(
+    os.path.join(DATA_DIR, 'title-index.json'),
+    max_titles=int(os.getenv('HEIMDALL_TITLE_INDEX_MAX', '20000')),
+    background=run_in_background,
+)
+atexit.register(title_index.save)
+
 WATCHLIST_FILE = os.path.join(DATA_DIR, 'watchlist.json')
 
 # If we're using the exe folder as DATA_DIR but legacy data exists in AppData,
@@ -503,20 +963,54 @@ def migrate_legacy_appdata_if_needed(target_dir):
         print('Migration check failed:', e)
 
 
-migrate_legacy_appdata_if_needed(DATA_DIR)
+# Watchlists live in SQLite; the legacy watchlist.json is imported on first start
+from .models.watchlist import Watchlist
+watchlist_model = None
 
-def load_watchlist():
-    """Load watchlist data from JSON file"""
-    try:
-        with open(WATCHLIST_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+# Legacy-data migrations and opening the watchlist database run on a
+# background thread so the server can start listening first. Only routes
+# that read users, profiles or watchlists wait for them (wait_for_data_layer);
+# TMDB, lyrics and music routes answer straight away on either stack.
+data_layer_ready = threading.Event()
+DATA_LAYER_PREFIXES = ('/api/login', '/api/signup', '/api/profiles', '/api/watchlist')
 
-def save_watchlist(data):
-    """Save watchlist data to JSON file"""
-    with open(WATCHLIST_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+def init_data_layer():
+    global watchlist_model
+    try:
+        with startup.phase('legacy_migration'):
+            migrate_legacy_appdata_if_needed(DATA_DIR)
+            user_model.migrate_legacy_profiles()
+        with startup.phase('watchlist_db'):
+            watchlist_model = Watchlist(os.path.join(DATA_DIR, 'watchlist.db'), legacy_json_path=WATCHLIST_FILE)
+    except Exception as e:
+        print(f"Data layer initialization failed: {e}")
+    finally:
+        startup.mark('data_layer_ready')
+        data_layer_ready.set()
+
+_background_init_lock = threading.Lock()
+_background_init_started = False
+
+def start_background_init():
+    """Start the data layer and static asset warm-up threads (idempotent).
+    Called by the server entry points rather than at import, so importing
+    this module (tools, or a yt-dlp worker re-importing __main__) doesn't
+    kick off migrations and file hashing."""
+    global _background_init_started
+    with _background_init_lock:
+        if _background_init_started:
+            return
+        _background_init_started = True
+    threading.Thread(target=init_data_layer, name='heimdall-init', daemon=True).start()
+    # Hash and precompress off the request path
+    threading.Thread(target=static_assets.warm, name='heimdall-static-warm', daemon=True).start()
+
+@app.before_request
+def wait_for_data_layer():
+    if request.path.startswith(DATA_LAYER_PREFIXES) and not data_layer_ready.is_set():
+        # Normally already running; covers a server started without an entry point
+        start_background_init()
+        data_layer_ready.wait()
 
 @app.route('/watchlist.html')
 def watchlist_page():
@@ -533,11 +1027,15 @@ def get_watchlist():
     
     username = session['username']
     profile = request.args.get('profile', 'default')
-    
-    watchlist_data = load_watchlist()
-    user_key = f"{username}:{profile}"
-    
-    return jsonify(watchlist_data.get(user_key, [])), 200
+
+    # Answer revalidations from the version alone, without loading items
+    etag = watchlist_model.version(username, profile)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(watchlist_model.get_items(username, profile))
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/watchlist', methods=['POST'])
 def add_to_watchlist():
@@ -553,17 +1051,8 @@ def add_to_watchlist():
     if not item:
         return jsonify({'message': 'No item provided'}), 400
     
-    watchlist_data = load_watchlist()
-    user_key = f"{username}:{profile}"
-    
-    if user_key not in watchlist_data:
-        watchlist_data[user_key] = []
-    
-    # Check if item already exists
-    existing_ids = [i['id'] for i in watchlist_data[user_key]]
-    if item['id'] not in existing_ids:
-        watchlist_data[user_key].append(item)
-        save_watchlist(watchlist_data)
+    # The (username, profile, id) key makes duplicate adds a no-op
+    if watchlist_model.add_item(username, profile, item):
         return jsonify({'message': 'Added to watchlist'}), 200
     
     return jsonify({'message': 'Already in watchlist'}), 200
@@ -577,15 +1066,7 @@ def remove_from_watchlist(item_id):
     username = session['username']
     profile = request.args.get('profile', 'default')
     
-    watchlist_data = load_watchlist()
-    user_key = f"{username}:{profile}"
-    
-    if user_key in watchlist_data:
-        watchlist_data[user_key] = [
-            item for item in watchlist_data[user_key] 
-            if item['id'] != item_id
-        ]
-        save_watchlist(watchlist_data)
+    watchlist_model.remove_item(username, profile, item_id)
     
     return jsonify({'message': 'Removed from watchlist'}), 200
 
@@ -596,65 +1077,319 @@ def delete_profile_watchlist(profile_name):
         return jsonify({'message': 'Not logged in'}), 401
     
     username = session['username']
-    user_key = f"{username}:{profile_name}"
-    
-    watchlist_data = load_watchlist()
-    
-    if user_key in watchlist_data:
-        del watchlist_data[user_key]
-        save_watchlist(watchlist_data)
+    if watchlist_model.delete_profile(username, profile_name):
         return jsonify({'message': 'Profile watchlist deleted'}), 200
     
     return jsonify({'message': 'No watchlist data found'}), 200
 
+# --- TMDB image proxy ---
+# Posters and backdrops are served from /img/<size>/<file> out of a local
+# content-addressed cache. TMDB never changes the image behind a file path,
+# so responses are cacheable for a year and carry the body's digest as a
+# strong ETag for revalidation.
+TMDB_IMAGE_BASE_URL = os.getenv('TMDB_IMAGE_BASE_URL', 'https://image.tmdb.org/t/p')
+TMDB_IMAGE_SIZES = {'w92', 'w154', 'w185', 'w300', 'w342', 'w500', 'w780', 'w1280', 'original'}
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+import re
+TMDB_IMAGE_PATH_RE = re.compile(r'^[A-Za-z0-9_-]+\.(jpg|jpeg|png|webp|svg)$')
+
+from .image_cache import ImageCache
+image_cache = ImageCache(
+    os.path.join(DATA_DIR, 'image-cache'),
+    max_bytes=int(float(os.getenv('HEIMDALL_IMAGE_CACHE_MB', '256')) * 1024 * 1024),
+)
+image_flight = SingleFlight(name='image')
+
+class ImageNotFound(Exception):
+    pass
+
+def _fetch_image_upstream(key):
+    response = http.get(f"{TMDB_IMAGE_BASE_URL}/{key}")
+    if response.status_code == 404:
+        raise ImageNotFound(key)
+    response.raise_for_status()
+    content_type = response.headers.get('Content-Type', 'application/octet-stream')
+    return response.content, image_cache.store(key, response.content, content_type)
+
+def _image_response(body, ref, status=200):
+    response = Response(body, status=status, mimetype=ref['content_type'])
+    response.set_etag(ref['digest'])
+    response.headers['Cache-Control'] = IMAGE_CACHE_CONTROL
+    return response
+
+@app.route('/img/<size>/<filename>')
+def serve_image(size, filename):
+    if size not in TMDB_IMAGE_SIZES or not TMDB_IMAGE_PATH_RE.match(filename):
+        abort(404)
+
+    key = f"{size}/{filename}"
+    ref = image_cache.lookup(key)
+    if ref is not None:
+        if request.if_none_match.contains(ref['digest']):
+            return _image_response(None, ref, status=304)
+        try:
+            with open(image_cache.blob_path(ref['digest']), 'rb') as f:
+                return _image_response(f.read(), ref)
+        except OSError:
+            pass  # Evicted between lookup and read; fetch it again
+
+    try:
+        # Concurrent misses for the same image share one download
+        body, ref = image_flight.do(key, lambda: _fetch_image_upstream(key))
+    except ImageNotFound:
+        abort(404)
+    except Exception as e:
+        print(f"Image proxy error for {key}: {e}")
+        return jsonify({'error': 'Image unavailable'}), 502
+
+    if request.if_none_match.contains(ref['digest']):
+        return _image_response(None, ref, status=304)
+    return _image_response(body, ref)
+
+# --- Music ---
+# All yt-dlp extraction runs in warm worker processes, off the server's GIL
+from .ytdlp_pool import extractor_pool
+
+# --- Music search cache ---
+# Results keyed by a normalized query. Empty result sets are cached too, but
+# only briefly, so a miss isn't re-searched on every keystroke.
+MUSIC_SEARCH_TTL = float(os.getenv('HEIMDALL_MUSIC_SEARCH_TTL', '3600'))
+MUSIC_SEARCH_EMPTY_TTL = float(os.getenv('HEIMDALL_MUSIC_SEARCH_EMPTY_TTL', '60'))
+
+music_search_cache = ResponseCache(
+    max_bytes=int(float(os.getenv('HEIMDALL_MUSIC_SEARCH_CACHE_MB', '4')) * 1024 * 1024),
+    default_ttl=MUSIC_SEARCH_TTL,
+    name='music_search',
+)
+music_search_flight = SingleFlight(name='music_search')
+
+def normalize_music_query(query):
+    """Fold case, punctuation and whitespace so trivially different
+    spellings of a query share a cache entry."""
+    import unicodedata
+    folded = ''.join(
+        ' ' if unicodedata.category(ch).startswith('P') else ch
+        for ch in unicodedata.normalize('NFKC', query).casefold()
+    )
+    return ' '.join(folded.split())
+
+# 'fast' searches with flat extraction (titles/ids only, no format or
+# signature resolution); formats are resolved later by /api/music/stream when
+# a track is actually played. 'full' is the old fully-resolved search.
+MUSIC_SEARCH_MODE = os.getenv('HEIMDALL_MUSIC_SEARCH_MODE', 'fast')
+MUSIC_SEARCH_COUNT = 5
+
+def _track_from_entry(video):
+    """Map a yt-dlp entry (full or flat) to the track shape the player uses."""
+    video_id = video.get('id')
+    url = video.get('webpage_url') or video.get('url')
+    if not url or not url.startswith('http'):
+        url = f"https://www.youtube.com/watch?v={video_id}"
+
+    image = video.get('thumbnail')
+    if not image and video.get('thumbnails'):
+        # Flat entries carry a list of thumbnails, largest last
+        image = video['thumbnails'][-1].get('url', '')
+    if not image and video_id:
+        image = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+    return {
+        'source': 'youtube',
+        'id': url, # The ID will be the full URL
+        'title': video['title'],
+        'artist': video.get('uploader') or video.get('channel') or 'Unknown Artist',
+        'image': image or '',
+        'duration': video.get('duration') or 0
+    }
+
+def youtube_search(query, mode=None):
+    """Run the yt-dlp search (in the extractor pool) and return up to 5
+    results. Raises if the search itself fails."""
+    all_results = []
+    mode = mode or MUSIC_SEARCH_MODE
+
+    for video in extractor_pool.run('search', query, mode):
+        try:
+            all_results.append(_track_from_entry(video))
+            # Stop after getting 5 valid results
+            if len(all_results) >= MUSIC_SEARCH_COUNT:
+                break
+        except Exception as e:
+            print(f"Error processing video: {e}")
+            continue
+    return all_results
+
+def _search_music_and_cache(query, mode, cache_key):
+    results = youtube_search(query, mode)
+    ttl = MUSIC_SEARCH_TTL if results else MUSIC_SEARCH_EMPTY_TTL
+    music_search_cache.set(cache_key, results, ttl=ttl)
+    return results
+
+def music_search_mode(args):
+    """(mode, error) for the music search query args; error is a (body,
+    status) pair to answer with instead. ?mode=full forces the slow
+    fully-resolved search."""
+    mode = args.get('mode', MUSIC_SEARCH_MODE)
+    if mode not in ('fast', 'full'):
+        return None, ({'error': 'Invalid mode'}, 400)
+    return mode, None
+
+def music_search_stream_args(args):
+    """((mode, count), error) for /api/music/search/<query>/stream."""
+    mode, error = music_search_mode(args)
+    if error:
+        return None, error
+    try:
+        count = max(1, min(int(args.get('count', MUSIC_SEARCH_COUNT)), 10))
+    except ValueError:
+        return None, ({'error': 'Invalid count'}, 400)
+    return (mode, count), None
+
+def music_search_lines(query, mode, count):
+    """NDJSON lines for a streaming search, one track each, produced as the
+    extractor yields them. The cache holds complete default-sized result
+    sets only."""
+    cache_key = (mode, normalize_music_query(query))
+    cached = music_search_cache.get(cache_key) if count == MUSIC_SEARCH_COUNT else MISSING
+    if cached is not MISSING:
+        for track in cached:
+            yield json.dumps(track) + '\n'
+        return
+
+    results = []
+    try:
+        for video in extractor_pool.iter('search_iter', query, mode, count):
+            try:
+                track = _track_from_entry(video)
+            except Exception as e:
+                print(f"Error processing video: {e}")
+                continue
+            results.append(track)
+            yield json.dumps(track) + '\n'
+    except Exception as e:
+        print(f"yt-dlp search error: {e}")
+        return
+
+    if count == MUSIC_SEARCH_COUNT:
+        ttl = MUSIC_SEARCH_TTL if results else MUSIC_SEARCH_EMPTY_TTL
+        music_search_cache.set(cache_key, results, ttl=ttl)
+
 @app.route('/api/music/search/<query>')
 def search_music(query):
-    all_results = []
+    mode, error = music_search_mode(request.args)
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    cache_key = (mode, normalize_music_query(query))
+    cached = music_search_cache.get(cache_key)
+    if cached is not MISSING:
+        return jsonify(cached)
 
-    # Search YouTube (using yt-dlp) with updated options to fix signature issues
-    YDL_OPTS = {
-        'format': 'bestaudio/best',
-        'noplaylist': True,
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': False,
-        'ignoreerrors': True,  # Continue on errors
-        'age_limit': None,
-        'geo_bypass': True,
-        # These options help with signature extraction issues
-        'extractor_retries': 3,
-        'fragment_retries': 10,
-        'skip_unavailable_fragments': True,
-    }
     try:
-        with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
-            # Search for 10 videos to ensure we get good results even if some fail
-            search_data = ydl.extract_info(f"ytsearch10:{query} official audio", download=False)
-            if search_data.get('entries'):
-                for video in search_data['entries']:
-                    # Skip videos that failed to extract
-                    if not video:
-                        continue
-                    try:
-                        all_results.append({
-                            'source': 'youtube',
-                            'id': video['webpage_url'], # The ID will be the full URL
-                            'title': video['title'],
-                            'artist': video.get('uploader', 'Unknown Artist'),
-                            'image': video.get('thumbnail', ''),
-                            'duration': video.get('duration', 0)
-                        })
-                        # Stop after getting 5 valid results
-                        if len(all_results) >= 5:
-                            break
-                    except Exception as e:
-                        print(f"Error processing video: {e}")
-                        continue
+        # Identical searches already running are shared, not repeated
+        all_results = music_search_flight.do(cache_key, lambda: _search_music_and_cache(query, mode, cache_key))
     except Exception as e:
+        # Failures aren't cached; the next search retries
         print(f"yt-dlp search error: {e}")
+        all_results = []
 
     return jsonify(all_results)
 
+@app.route('/api/music/search/<query>/stream')
+def search_music_stream(query):
+    """
+    Streaming variant of search_music: newline-delimited JSON, one track
+    per line, each sent as soon as yt-dlp yields it. Extraction stops once
+    ?count= results (default 5, max 10) have been sent.
+    """
+    params, error = music_search_stream_args(request.args)
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    mode, count = params
+    return Response(stream_with_context(music_search_lines(query, mode, count)), mimetype='application/x-ndjson')
+
+# Concurrent plays of the same track share one yt-dlp resolve
+music_stream_flight = SingleFlight(name='music_stream')
+
+def resolve_stream(source, track_id):
+    """
+    Resolve a playable direct stream URL for a track. Raises on failure.
+    Also returns the duration and thumbnail, which fast (flat) search
+    results may not have had.
+    """
+    if source != 'youtube':
+        raise Exception("Could not find stream URL")
+
+    info = extractor_pool.run('resolve', track_id)
+    return {
+        'stream_url': info['url'],
+        'duration': info.get('duration') or 0,
+        'image': info.get('thumbnail') or '',
+    }
+
+# --- Stream URL cache ---
+# Direct stream URLs carry their own expiry (googlevideo's `expire` param).
+# Cached URLs are dropped EXPIRY_MARGIN seconds before that, and refreshed in
+# the background once they are within REFRESH_AHEAD of being dropped.
+STREAM_DEFAULT_TTL = float(os.getenv('HEIMDALL_STREAM_DEFAULT_TTL', '1800'))
+STREAM_EXPIRY_MARGIN = float(os.getenv('HEIMDALL_STREAM_EXPIRY_MARGIN', '300'))
+STREAM_REFRESH_AHEAD = float(os.getenv('HEIMDALL_STREAM_REFRESH_AHEAD', '600'))
+
+stream_cache = ResponseCache(
+    max_bytes=int(float(os.getenv('HEIMDALL_STREAM_CACHE_MB', '2')) * 1024 * 1024),
+    default_ttl=STREAM_DEFAULT_TTL,
+    name='music_stream',
+)
+
+def stream_url_expiry(stream_url):
+    """Epoch seconds at which a direct stream URL stops working, if it says."""
+    from urllib.parse import urlsplit, parse_qs
+    try:
+        return float(parse_qs(urlsplit(stream_url).query)['expire'][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+def _resolve_and_cache_stream(source, track_id):
+    stream = resolve_stream(source, track_id)
+    expires_at = stream_url_expiry(stream['stream_url']) or time.time() + STREAM_DEFAULT_TTL
+    stream['expires_at'] = int(expires_at)
+    stream_cache.set((source, track_id), stream, ttl=expires_at - STREAM_EXPIRY_MARGIN - time.time())
+    return stream
+
+# Refresh-ahead resolves can wait up to a full extraction job; they get their
+# own small pool rather than a shared fan-out worker that TMDB routes need
+from concurrent.futures import ThreadPoolExecutor
+stream_refresh_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('HEIMDALL_STREAM_REFRESH_WORKERS', '2')),
+    thread_name_prefix='heimdall-stream-refresh',
+)
+
+def peek_stream(source, track_id):
+    """The cached stream for a track, or MISSING. Never blocks; a URL close
+    to expiry is refreshed in the background."""
+    key = (source, track_id)
+    cached = stream_cache.get(key)
+    if cached is not MISSING:
+        remaining = cached['expires_at'] - STREAM_EXPIRY_MARGIN - time.time()
+        if remaining < STREAM_REFRESH_AHEAD:
+            # Still usable now, but fetch a fresh URL before it lapses
+            run_in_background(
+                music_stream_flight.do, key, lambda: _resolve_and_cache_stream(source, track_id),
+                executor=stream_refresh_executor,
+            )
+    return cached
+
+def get_stream(source, track_id):
+    """Cached, coalesced stream resolve. Raises on failure."""
+    cached = peek_stream(source, track_id)
+    if cached is not MISSING:
+        return cached
+    return music_stream_flight.do((source, track_id), lambda: _resolve_and_cache_stream(source, track_id))
+
 @app.route('/api/music/stream')
 def get_music_stream():
     source = request.args.get('source')
@@ -663,99 +1398,371 @@ def get_music_stream():
     if not source or not track_id:
         return jsonify({'error': 'Missing source or id'}), 400
 
-    stream_url = ''
     try:
-        if source == 'youtube':
-            YDL_OPTS = {
-                'format': 'bestaudio/best', # Select best audio
-                'quiet': True,
-                'no_warnings': True,
-                'ignoreerrors': True,
-                'extractor_retries': 3,
-                'fragment_retries': 10,
-                'skip_unavailable_fragments': True,
-            }
-            with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
-                info = ydl.extract_info(track_id, download=False)
-                if info and 'url' in info:
-                    stream_url = info['url'] # This is the direct stream URL
-                else:
-                    raise Exception("Could not extract stream URL")
-
-        if not stream_url:
-            raise Exception("Could not find stream URL")
-
-        return jsonify({'stream_url': stream_url})
+        return jsonify(with_audio_proxy(get_stream(source, track_id), track_id))
 
     except Exception as e:
         print(f"Stream error: {e}")
         return jsonify({'error': str(e)}), 500
     
+# Batch resolves run on their own small pool so a long queue prefetch can't
+# occupy the shared fan-out workers that TMDB routes rely on
+STREAM_BATCH_MAX = int(os.getenv('HEIMDALL_STREAM_BATCH_MAX', '10'))
+STREAM_BATCH_TIMEOUT = float(os.getenv('HEIMDALL_STREAM_BATCH_TIMEOUT', '30'))
+
+stream_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('HEIMDALL_STREAM_BATCH_WORKERS', '3')),
+    thread_name_prefix='heimdall-stream-batch',
+)
+
+@app.route('/api/music/stream/batch', methods=['POST'])
+def get_music_stream_batch():
+    """
+    Resolve several tracks at once, e.g. the next few queue entries, so the
+    player can prefetch them. Body: {"source": "youtube", "ids": [...]}.
+    Returns {"results": {id: stream}, "errors": {id: message}}. Tracks that
+    miss the deadline (running or still queued on the batch pool) keep
+    resolving in the background and land in the stream cache for the next
+    request.
+    """
+    if 'username' not in session:
+        return jsonify({'message': 'Not logged in'}), 401
+
+    request_data, error = stream_batch_request(request.get_json(silent=True))
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    source, track_ids = request_data
+    calls = {track_id: (lambda t=track_id: get_stream(source, t)) for track_id in track_ids}
+    results, errors = fan_out(
+        calls, timeout=STREAM_BATCH_TIMEOUT, executor=stream_batch_executor, finish_late=True,
+    )
+    return jsonify(stream_batch_payload(results, errors))
+
+def stream_batch_request(data):
+    """((source, unique track ids), error) for a /api/music/stream/batch body."""
+    data = data if isinstance(data, dict) else {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return None, ({'error': 'Missing ids'}, 400)
+    if len(ids) > STREAM_BATCH_MAX:
+        return None, ({'error': f'At most {STREAM_BATCH_MAX} ids per batch'}, 400)
+    track_ids = [t for t in dict.fromkeys(ids) if isinstance(t, str) and t]
+    return (data.get('source', 'youtube'), track_ids), None
+
+def stream_batch_payload(results, errors):
+    return {
+        'results': {track_id: with_audio_proxy(stream, track_id) for track_id, stream in results.items()},
+        'errors': {track_id: str(e) for track_id, e in errors.items()},
+    }
+
+# --- Local audio proxy ---
+# Optional (HEIMDALL_AUDIO_PROXY=1): the player streams through
+# /api/music/audio/<video id> instead of straight from googlevideo. Fetched
+# byte ranges are kept in an on-disk segment cache, so replays and seeks into
+# already-played parts never leave the machine.
+AUDIO_PROXY_ENABLED = os.getenv('HEIMDALL_AUDIO_PROXY', '0') == '1'
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+from .segment_cache import SegmentCache
+audio_cache = SegmentCache(
+    os.path.join(DATA_DIR, 'audio-cache'),
+    max_bytes=int(float(os.getenv('HEIMDALL_AUDIO_CACHE_MB', '512')) * 1024 * 1024),
+)
+
+YOUTUBE_VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{6,20}$')
+
+def youtube_video_id(track_id):
+    """The video id of a YouTube track id (a watch URL), or None."""
+    from urllib.parse import urlsplit, parse_qs
+    try:
+        video_id = parse_qs(urlsplit(track_id).query)['v'][0]
+    except (KeyError, IndexError, ValueError):
+        return None
+    return video_id if YOUTUBE_VIDEO_ID_RE.match(video_id) else None
+
+def with_audio_proxy(stream, track_id):
+    """Add the local proxy URL to a stream response when the proxy is on."""
+    video_id = youtube_video_id(track_id) if AUDIO_PROXY_ENABLED else None
+    if not video_id:
+        return stream
+    return dict(stream, audio_url=f'/api/music/audio/{video_id}')
+
+def _open_audio_upstream(track_id, start, end):
+    """GET bytes start..end of a track's direct stream URL. An expired URL
+    (403/410) is re-resolved once."""
+    for attempt in range(2):
+        stream = get_stream('youtube', track_id)
+        response = http.get(
+            stream['stream_url'],
+            headers={'Range': f'bytes={start}-{end}'},
+            stream=True,
+        )
+        if response.status_code in (403, 410) and attempt == 0:
+            response.close()
+            stream_cache.delete(('youtube', track_id))
+            continue
+        response.raise_for_status()
+        return response
+
+def _upstream_total(response):
+    """Full object size from a Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    if response.status_code == 200 and response.headers.get('Content-Length', '').isdigit():
+        return int(response.headers['Content-Length'])
+    return None
+
+def _audio_upstream_chunks(key, track_id, total, start, end):
+    """Chunks of bytes start..end from upstream, for SegmentCache.iter_range.
+    Stops early (rather than raising mid-response) on upstream errors."""
+    try:
+        response = _open_audio_upstream(track_id, start, end)
+    except Exception as e:
+        print(f"Audio upstream error for {track_id}: {e}")
+        return
+    try:
+        if _upstream_total(response) != total:
+            # A fresh resolve picked a different format; cached segments
+            # no longer line up with it
+            print(f"Audio upstream for {track_id} changed size; dropping cache")
+            audio_cache.drop(key)
+            return
+        if response.status_code != 206 and start > 0:
+            print(f"Audio upstream for {track_id} ignored the Range header")
+            return
+        remaining = end - start + 1
+        for chunk in response.iter_content(AUDIO_CHUNK_SIZE):
+            if remaining <= 0:
+                break
+            yield chunk[:remaining]
+            remaining -= len(chunk)
+    except http_client.RequestException as e:
+        print(f"Audio upstream read error for {track_id}: {e}")
+    finally:
+        response.close()
+
+def _audio_meta(key, track_id):
+    """Size and content type of a track, fetching (and caching) its first
+    segment when it hasn't been seen before."""
+    meta = audio_cache.get_meta(key)
+    if meta:
+        return meta
+
+    response = _open_audio_upstream(track_id, 0, audio_cache.segment_size - 1)
+    try:
+        total = _upstream_total(response)
+        if not total:
+            raise Exception("Upstream did not report the stream size")
+        meta = {
+            'total': total,
+            'content_type': response.headers.get('Content-Type', 'application/octet-stream'),
+        }
+        first = b''
+        limit = min(audio_cache.segment_size, total)
+        for chunk in response.iter_content(AUDIO_CHUNK_SIZE):
+            first += chunk
+            if len(first) >= limit:
+                break
+    finally:
+        response.close()
+
+    audio_cache.set_meta(key, meta)
+    if len(first) >= limit:
+        audio_cache.write_segment(key, 0, first[:limit])
+    return meta
+
+def _exact_length(chunks, length, track_id):
+    """Pass chunks through, raising if they add up to less than length. The
+    headers already promised length bytes, so a short body must make the
+    server drop the connection rather than end the response cleanly."""
+    sent = 0
+    for chunk in chunks:
+        sent += len(chunk)
+        yield chunk
+    if sent < length:
+        raise IOError(f"Audio proxy for {track_id} ended after {sent} of {length} bytes")
+
+def parse_byte_range(header, total):
+    """
+    (start, end) for a single-range "bytes=" header, None when there is no
+    usable header (serve everything), or False if it can't be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                return False
+            return max(total - suffix, 0), total - 1
+        start = int(first)
+        end = int(last) if last else total - 1
+    except ValueError:
+        return None
+    if start >= total or end < start:
+        return False
+    return start, min(end, total - 1)
+
+@app.route('/api/music/audio/<video_id>')
+def get_music_audio(video_id):
+    """Range-capable audio proxy backed by the on-disk segment cache."""
+    if not AUDIO_PROXY_ENABLED:
+        abort(404)
+    if 'username' not in session:
+        return jsonify({'message': 'Not logged in'}), 401
+
+    status, headers, body = audio_proxy(video_id, request.headers.get('Range'))
+    if isinstance(body, dict):
+        return jsonify(body), status
+    return Response(body, status=status, headers=headers)
+
+def audio_proxy(video_id, range_header):
+    """
+    (status, headers, body) for an audio proxy request, where body is a
+    dict for JSON error answers and otherwise an iterator of bytes. Does
+    blocking I/O (the first segment of an unseen track is fetched here).
+    """
+    if not YOUTUBE_VIDEO_ID_RE.match(video_id):
+        return 400, {}, {'error': 'Invalid id'}
+
+    # Keyed by video id so the cache survives stream URL rotation
+    key = f'youtube-{video_id}'
+    track_id = f'https://www.youtube.com/watch?v={video_id}'
+    try:
+        meta = _audio_meta(key, track_id)
+    except Exception as e:
+        print(f"Audio proxy error: {e}")
+        return 502, {}, {'error': str(e)}
+
+    total = meta['total']
+    byte_range = parse_byte_range(range_header, total)
+    if byte_range is False:
+        return 416, {'Content-Range': f'bytes */{total}'}, []
+
+    start, end = byte_range or (0, total - 1)
+    body = audio_cache.iter_range(
+        key, start, end, total,
+        lambda s, e: _audio_upstream_chunks(key, track_id, total, s, e),
+    )
+    body = _exact_length(body, end - start + 1, track_id)
+    headers = {
+        'Content-Type': meta['content_type'],
+        'Accept-Ranges': 'bytes',
+        'Content-Length': str(end - start + 1),
+    }
+    if byte_range:
+        headers['Content-Range'] = f'bytes {start}-{end}/{total}'
+    return (206 if byte_range else 200), headers, body
+
+# --- Lyrics ---
+# Every source is queried at once (or staggered by HEIMDALL_LYRICS_HEDGE_DELAY
+# seconds, in HEIMDALL_LYRICS_SOURCES order) and the first one with lyrics
+# wins. Results, including "not found", go to a persistent cache.
+LYRICS_TIMEOUT = float(os.getenv('HEIMDALL_LYRICS_TIMEOUT', '5'))
+LYRICS_HEDGE_DELAY = float(os.getenv('HEIMDALL_LYRICS_HEDGE_DELAY', '0'))
+
+def _ovh_request(artist, title):
+    from urllib.parse import quote
+    return f"https://api.lyrics.ovh/v1/{quote(artist, safe='')}/{quote(title, safe='')}", None
+
+def _ovh_parse(data):
+    return (data.get('lyrics') or '').strip() or None
+
+def _lrclib_request(artist, title):
+    return "https://lrclib.net/api/get", {'artist_name': artist, 'track_name': title}
+
+def _lrclib_parse(data):
+    # Synced lyrics are the fallback when there is no plain text version
+    return (data.get('plainLyrics') or data.get('syncedLyrics') or '').strip() or None
+
+# Source name -> (build (url, params) from artist/title, parse a 200 body)
+LYRICS_SOURCES = {
+    'lyrics.ovh': (_ovh_request, _ovh_parse),
+    'lrclib': (_lrclib_request, _lrclib_parse),
+}
+LYRICS_DEFAULT_PRIORITY = ['lyrics.ovh', 'lrclib']
+LYRICS_PRIORITY = [
+    name.strip()
+    for name in os.getenv('HEIMDALL_LYRICS_SOURCES', ','.join(LYRICS_DEFAULT_PRIORITY)).split(',')
+    if name.strip() in LYRICS_SOURCES
+]
+if not LYRICS_PRIORITY:
+    print(f"HEIMDALL_LYRICS_SOURCES names no known source; using {', '.join(LYRICS_DEFAULT_PRIORITY)}")
+    LYRICS_PRIORITY = list(LYRICS_DEFAULT_PRIORITY)
+
+def lookup_lyrics(name, artist, title):
+    """Ask one source. Returns the lyrics, None for "not found", or raises."""
+    build, parse = LYRICS_SOURCES[name]
+    url, params = build(artist, title)
+    response = http.get(url, params=params, timeout=LYRICS_TIMEOUT)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return parse(response.json())
+
+from .lyrics_cache import LyricsCache
+lyrics_cache = LyricsCache(
+    os.path.join(DATA_DIR, 'lyrics.db'),
+    ttl=float(os.getenv('HEIMDALL_LYRICS_TTL', str(30 * 86400))),
+    negative_ttl=float(os.getenv('HEIMDALL_LYRICS_NEGATIVE_TTL', '86400')),
+    normalize=normalize_music_query,
+)
+
+LYRICS_NOT_FOUND = {'error': 'Lyrics not found in any source'}
+
+def cached_lyrics(artist, title):
+    """(body, status) from the lyrics cache, or None on a miss."""
+    found, lyrics, source = lyrics_cache.get(artist, title)
+    if not found:
+        return None
+    if lyrics is None:
+        return LYRICS_NOT_FOUND, 404
+    return {'lyrics': lyrics, 'source': source}, 200
+
+def finish_lyrics_lookup(artist, title, source, lyrics, errors):
+    """Cache the outcome of a race over the sources; returns (body, status)."""
+    for name, e in errors.items():
+        print(f"{name} error: {e}")
+
+    if lyrics is not None:
+        print(f"Success from {source}")
+        lyrics_cache.set(artist, title, lyrics, source)
+        return {'lyrics': lyrics, 'source': source}, 200
+
+    # Only remember a miss when every source actually said "not found";
+    # timeouts and outages (or having no source to ask) are retried next time
+    if LYRICS_PRIORITY and not errors:
+        lyrics_cache.set(artist, title, None)
+    return LYRICS_NOT_FOUND, 404
+
 @app.route('/api/music/lyrics')
 def get_lyrics():
-    """Proxy endpoint for lyrics with multiple fallback APIs"""
+    """Proxy endpoint for lyrics, racing every configured source"""
     artist = request.args.get('artist')
     title = request.args.get('title')
-    
+
     if not artist or not title:
         return jsonify({'error': 'Missing artist or title'}), 400
-    
-    # Try multiple lyrics sources
-    lyrics_sources = [
-        {
-            'name': 'lyrics.ovh',
-            'url': f"https://api.lyrics.ovh/v1/{artist}/{title}",
-            'timeout': 5
-        },
-        {
-            'name': 'lrclib',
-            'url': f"https://lrclib.net/api/get?artist_name={artist}&track_name={title}",
-            'timeout': 5
-        }
-    ]
-    
-    for source in lyrics_sources:
-        try:
-            print(f"Trying {source['name']} for: {artist} - {title}")
-            response = requests.get(source['url'], timeout=source['timeout'])
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle different API response formats
-                if 'lyrics' in data:
-                    # lyrics.ovh format
-                    print(f"Success from {source['name']}")
-                    return jsonify({'lyrics': data['lyrics']}), 200
-                elif 'plainLyrics' in data:
-                    # lrclib format
-                    print(f"Success from {source['name']}")
-                    return jsonify({'lyrics': data['plainLyrics']}), 200
-                elif 'syncedLyrics' in data:
-                    # lrclib synced format (fallback)
-                    print(f"Success from {source['name']} (synced)")
-                    return jsonify({'lyrics': data['syncedLyrics']}), 200
-                    
-        except requests.exceptions.Timeout:
-            print(f"{source['name']} timed out")
-            continue
-        except requests.exceptions.ConnectionError:
-            print(f"{source['name']} connection failed")
-            continue
-        except Exception as e:
-            print(f"{source['name']} error: {e}")
-            continue
-    
-    # All sources failed
-    return jsonify({'error': 'Lyrics not found in any source'}), 404
 
-if __name__ == '__main__':
-    # Prefer waitress for a stable single-process server (no reloader).
-    try:
-        from waitress import serve
-        print('Starting waitress server on 127.0.0.1:8000')
-        serve(app, host='127.0.0.1', port=8000)
-    except Exception:
-        # Fall back to Flask dev server if waitress isn't available.
-        print('Waitress not available, starting Flask dev server (debug=False)')
-        app.run(host='127.0.0.1', port=8000, debug=False)
+    cached = cached_lyrics(artist, title)
+    if cached is not None:
+        body, status = cached
+        return jsonify(body), status
+
+    print(f"Looking up lyrics for: {artist} - {title}")
+    source, lyrics, errors = race(
+        [(name, (lambda n=name: lookup_lyrics(n, artist, title))) for name in LYRICS_PRIORITY],
+        timeout=LYRICS_TIMEOUT + 1,
+        hedge_delay=LYRICS_HEDGE_DELAY,
+    )
+    body, status = finish_lyrics_lookup(artist, title, source, lyrics, errors)
+    return jsonify(body), status
+
+startup.stop_tracking_imports()
+startup.mark('app_imported')
+
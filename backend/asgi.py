@@ -0,0 +1,697 @@
+"""
+asgi.py
+
+ASGI entry point. The API routes that spend their time waiting on
+upstreams (TMDB, lyrics, music and the audio proxy) are served here by
+coroutines, so in-flight upstream requests cost tasks rather than server
+threads. Everything else (HTML pages, static files, auth, profiles,
+watchlist and the image proxy) is handed to the Flask app unchanged through
+a WSGI bridge.
+
+The async routes are thin wrappers: request parsing, payloads, caches and
+the session cookie all come from app.py, and errors are the same werkzeug
+responses Flask sends, so both stacks answer identically. Blocking work
+(yt-dlp jobs, the audio segment cache, SQLite, the title index) runs on
+bounded executors or worker threads, never on the event loop. Without
+uvicorn, aiohttp and a2wsgi the server falls back to waitress, which serves
+every route from app.py.
+
+Run with: uvicorn backend.asgi:asgi_app
+"""
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import importlib.util
+
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException, InternalServerError, abort
+
+# aiohttp is imported on first use (see async_http.py), but this stack can't
+# work without it; fail here so callers fall back to waitress as before
+if importlib.util.find_spec('aiohttp') is None:
+    raise ModuleNotFoundError("No module named 'aiohttp'", name='aiohttp')
+
+from . import app as core
+from . import startup
+from .async_http import async_http, AsyncHttpError
+from .cache import MISSING
+from .conditional import (
+    cache_policy, body_etag, etag_matches, encoded_etag, choose_encoding,
+    compress, NO_STORE,
+)
+from .fanout import fan_out_async, race_async
+from .singleflight import AsyncSingleFlight
+from .ytdlp_pool import ExtractionTimeout
+
+
+# --- Requests and responses ---
+
+class Request:
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self.receive = receive
+        self.method = scope['method']
+        self.path = scope['path']
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+        self.args = {key: values[0] for key, values in query.items()}
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])
+        }
+        self._username = MISSING
+        self.vary_cookie = False
+
+    async def body(self):
+        chunks = []
+        while True:
+            message = await self.receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def json(self):
+        """The parsed JSON body, or None (like Flask's get_json(silent=True))."""
+        try:
+            return json.loads(await self.body())
+        except ValueError:
+            return None
+
+    @property
+    def username(self):
+        """The logged-in user from Flask's signed session cookie, or None."""
+        if self._username is MISSING:
+            self._username = _session_username(self.headers.get('cookie'))
+            # Flask adds "Vary: Cookie" once a view reads the session
+            self.vary_cookie = True
+        return self._username
+
+
+def _session_username(cookie_header):
+    flask_app = core.app
+    if not cookie_header:
+        return None
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cookie_header)
+    except Exception:
+        return None
+    morsel = cookie.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if serializer is None:
+        return None
+    try:
+        data = serializer.loads(
+            morsel.value,
+            max_age=int(flask_app.permanent_session_lifetime.total_seconds()),
+        )
+    except Exception:
+        return None
+    return data.get('username')
+
+
+NO_STORE_HEADERS = [
+    (b'cache-control', NO_STORE.encode('latin-1')),
+    (b'pragma', b'no-cache'),
+    (b'expires', b'0'),
+]
+
+
+class Response:
+    def __init__(self, body=b'', status=200, content_type='application/json', headers=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.headers = [(b'content-type', content_type.encode('latin-1'))]
+        self.vary = []
+        for name, value in (headers or {}).items():
+            self.headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+
+    def _start(self, request):
+        headers = list(self.headers)
+        vary = list(self.vary)
+        if request.vary_cookie:
+            vary.append('Cookie')
+        # Same as flask-cors' defaults on the Flask side: the origin is
+        # echoed back when sent, '*' otherwise
+        origin = request.headers.get('origin')
+        if origin:
+            vary.append('Origin')
+        headers.append((b'access-control-allow-origin', (origin or '*').encode('latin-1')))
+        if vary:
+            headers.append((b'vary', ', '.join(vary).encode('latin-1')))
+        return {'type': 'http.response.start', 'status': self.status, 'headers': headers}
+
+    def _apply_cache_rules(self, request):
+        """Mirrors app.add_cache_control_headers."""
+        policy = cache_policy(request.method, request.path, self.status)
+        if policy == NO_STORE:
+            self.headers += NO_STORE_HEADERS
+            return
+        self.headers.append((b'cache-control', policy.encode('latin-1')))
+        self.vary.append('Accept-Encoding')
+
+        etag = body_etag(self.body)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            self.status = 304
+            self.body = b''
+            self.headers = [h for h in self.headers if h[0] != b'content-type']
+            self.headers.append((b'etag', f'"{etag}"'.encode('latin-1')))
+            return
+
+        encoding = choose_encoding(request.headers.get('accept-encoding'), self.content_type, len(self.body))
+        if encoding:
+            self.body = compress(self.body, encoding, etag)
+            self.headers.append((b'content-encoding', encoding.encode('latin-1')))
+        self.headers.append((b'etag', f'"{encoded_etag(etag, encoding)}"'.encode('latin-1')))
+
+    async def send(self, send, request):
+        self._apply_cache_rules(request)
+        start = self._start(request)
+        start['headers'].append((b'content-length', str(len(self.body)).encode('latin-1')))
+        await send(start)
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+class StreamingResponse(Response):
+    def __init__(self, chunks, status=200, content_type='application/octet-stream', headers=None):
+        super().__init__(b'', status, content_type, headers)
+        self.chunks = chunks
+
+    async def send(self, send, request):
+        # Streamed bodies are never stored, as on the Flask side. An error
+        # mid-body propagates, so the server drops the connection.
+        self.headers += NO_STORE_HEADERS
+        await send(self._start(request))
+        try:
+            async for chunk in self.chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            await self.chunks.aclose()
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def json_response(data, status=200, headers=None):
+    # Same formatting as Flask's jsonify outside debug mode
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')) + '\n'
+    return Response(body.encode('utf-8'), status, 'application/json', headers)
+
+
+def not_logged_in():
+    return json_response({'message': 'Not logged in'}, 401)
+
+
+def error_response(error):
+    """The response Flask sends for a werkzeug HTTPException, e.g. the HTML
+    page for abort(500, msg)."""
+    return Response(error.get_body().encode('utf-8'), error.code, 'text/html; charset=utf-8')
+
+
+def error_pair_response(error):
+    """json_response for a (body, status) pair from an app.py helper."""
+    body, status = error
+    return json_response(body, status)
+
+
+def stale_headers(stale_seconds):
+    """Headers app.mark_stale would add."""
+    if not stale_seconds:
+        return None
+    return {'Age': stale_seconds, 'X-Heimdall-Stale': stale_seconds}
+
+
+# --- Routing ---
+
+_routes = []
+
+def route(rule, methods=('GET',)):
+    """Register a handler for a Flask-style rule ('/api/x/<int:id>')."""
+    def to_regex(match):
+        converter, name = match.group(1), match.group(2)
+        return f'(?P<{name}>\\d+)' if converter == 'int' else f'(?P<{name}>[^/]+)'
+    pattern = re.compile(re.sub(r'<(?:(\w+):)?(\w+)>', to_regex, rule) + '$')
+
+    def register(handler):
+        _routes.append((pattern, frozenset(methods), handler))
+        return handler
+    return register
+
+
+# --- TMDB ---
+
+tmdb_flight = AsyncSingleFlight(name='tmdb_async')
+
+async def fetch_tmdb(endpoint, extra_params={}):
+    """Async app.fetch_tmdb, sharing its cache."""
+    if not core.TMDB_API_KEY:
+        abort(500, "TMDB API key not configured")
+
+    full_url, params, cache_key = core.tmdb_request(endpoint, extra_params)
+    cached = core.tmdb_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+    return await tmdb_flight.do(cache_key, lambda: _fetch_tmdb_upstream(endpoint, full_url, params, cache_key))
+
+async def _fetch_tmdb_upstream(endpoint, full_url, params, cache_key, cache=None):
+    try:
+        response = await async_http.get(full_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+    except (AsyncHttpError, ValueError) as e:
+        print(f"Error fetching data from TMDB: {str(e)}")
+        abort(500, f"Error fetching data from TMDB: {str(e)}")
+
+    if cache is None:
+        core.tmdb_cache.set(cache_key, data, ttl=core.tmdb_cache_ttl(endpoint), size=len(response.content))
+    else:
+        cache.set(cache_key, data, size=len(response.content))
+    await asyncio.to_thread(core.title_index.add_results, endpoint, data)
+    return data
+
+# Longest a request waits on a background refresh of the same endpoint
+# before fetching it itself
+CATALOG_WAIT_TIMEOUT = 15
+
+async def fetch_catalog(endpoint):
+    """Async app.fetch_catalog. Returns (data, stale_seconds)."""
+    refresher = core.catalog_refresher
+    if refresher.handles(endpoint):
+        cached = refresher.peek(endpoint)
+        if cached is None and await asyncio.to_thread(refresher.wait, endpoint, CATALOG_WAIT_TIMEOUT):
+            cached = refresher.peek(endpoint)
+        if cached is not None:
+            return cached
+        data = await fetch_tmdb(endpoint)
+        refresher.put(endpoint, data)
+        return data, 0
+    return await fetch_tmdb(endpoint), 0
+
+
+def catalog_route(rule, endpoint):
+    @route(rule)
+    async def handler(request):
+        if not request.username:
+            return not_logged_in()
+        data, stale = await fetch_catalog(endpoint)
+        return json_response(data.get('results', []), headers=stale_headers(stale))
+    return handler
+
+catalog_route('/api/movies/popular', '/movie/popular')
+catalog_route('/api/movies/trending', '/trending/movie/week')
+catalog_route('/api/movies/top-rated', '/movie/top_rated')
+catalog_route('/api/tv/popular', '/tv/popular')
+catalog_route('/api/tv/trending', '/trending/tv/week')
+catalog_route('/api/tv/top-rated', '/tv/top_rated')
+
+@route('/api/home')
+async def get_home(request):
+    if not request.username:
+        return not_logged_in()
+
+    names, unknown = core.home_row_names(request.args.get('rows'))
+    if unknown:
+        return json_response({'message': f"Unknown rows: {', '.join(unknown)}"}, 400)
+
+    calls = {name: (lambda e=core.HOME_ROWS[name]: fetch_catalog(e)) for name in names}
+    results, errors = await fan_out_async(calls, timeout=core.HOME_ROW_TIMEOUT)
+
+    payload, stale = core.home_payload(names, results, errors)
+    return json_response(payload, headers=stale_headers(stale))
+
+@route('/api/genres/<media_type>')
+async def get_genres(request, media_type):
+    if not request.username:
+        return not_logged_in()
+    if media_type not in ['movie', 'tv']:
+        return json_response({'message': 'Invalid media type'}, 400)
+
+    data, stale = await fetch_catalog(f'/genre/{media_type}/list')
+    return json_response(data.get('genres', []), headers=stale_headers(stale))
+
+@route('/api/discover')
+async def discover_media(request):
+    if not request.username:
+        return not_logged_in()
+    endpoint, params = core.discover_request(request.args)
+    data = await fetch_discover(endpoint, params)
+    return json_response(core.discover_payload(data))
+
+# Strong references to running prefetch tasks, so they aren't collected
+_prefetch_tasks = set()
+
+async def fetch_discover(endpoint, params):
+    """Async app.fetch_discover."""
+    data = core.take_prefetched(endpoint, params)
+    hit = data is not MISSING
+    if not hit:
+        data = await fetch_tmdb(endpoint, extra_params=params)
+    if core.TMDB_API_KEY:
+        for page_params in core.plan_prefetch(endpoint, params, data, hit):
+            task = asyncio.create_task(prefetch_discover_page(endpoint, page_params))
+            _prefetch_tasks.add(task)
+            task.add_done_callback(_prefetch_tasks.discard)
+    return data
+
+async def prefetch_discover_page(endpoint, params):
+    full_url, params_full, cache_key = core.tmdb_request(endpoint, params)
+    failed = True
+    try:
+        await tmdb_flight.do(cache_key, lambda: _fetch_tmdb_upstream(
+            endpoint, full_url, params_full, cache_key, cache=core.discover_prefetcher.cache,
+        ))
+        failed = False
+    except Exception as e:
+        print(f"Discover prefetch failed for {endpoint} page {params.get('page')}: {e}")
+    finally:
+        core.discover_prefetcher.done(endpoint, params, failed=failed)
+
+@route('/api/search')
+async def search_media(request):
+    if not request.username:
+        return not_logged_in()
+
+    query = request.args.get('q')
+    if not query or len(query) < 2:
+        return json_response([])
+
+    local = await asyncio.to_thread(core.title_index.search, query, limit=core.SEARCH_SUGGEST_LIMIT)
+    data = await fetch_tmdb('/search/multi', {'query': query, 'include_adult': 'false'})
+    return json_response(core.merge_search_results(local, data))
+
+@route('/api/search/suggest')
+async def suggest_media(request):
+    if not request.username:
+        return not_logged_in()
+
+    query = request.args.get('q')
+    if not query or len(query) < 2:
+        return json_response([])
+    return json_response(await asyncio.to_thread(core.title_index.search, query, limit=core.SEARCH_SUGGEST_LIMIT))
+
+@route('/api/details/<media_type>/<int:tmdb_id>')
+async def get_details(request, media_type, tmdb_id):
+    if not request.username:
+        return not_logged_in()
+    if media_type not in ['movie', 'tv']:
+        return json_response({'message': 'Invalid media type'}, 400)
+
+    tmdb_id = int(tmdb_id)
+    try:
+        endpoint, append = core.details_request(media_type, tmdb_id)
+        data = await fetch_tmdb(endpoint, {'append_to_response': ','.join(append)})
+        details_data, parts = core.split_appended(data, append)
+        return json_response(core.details_payload(tmdb_id, details_data, parts))
+    except Exception as e:
+        print(f"Error in get_details: {e}")
+        abort(500, "Error fetching details from provider.")
+
+@route('/api/tv/<int:tv_id>/season/<int:season_number>')
+async def get_season_details(request, tv_id, season_number):
+    if not request.username:
+        return not_logged_in()
+    try:
+        season_data = await fetch_tmdb(f'/tv/{int(tv_id)}/season/{int(season_number)}')
+        return json_response(season_data)
+    except Exception as e:
+        print(f"Error in get_season_details: {e}")
+        abort(500, "Error fetching season details.")
+
+
+# --- Lyrics ---
+
+async def lookup_lyrics(name, artist, title):
+    """Async app.lookup_lyrics."""
+    build, parse = core.LYRICS_SOURCES[name]
+    url, params = build(artist, title)
+    response = await async_http.get(url, params=params, timeout=core.LYRICS_TIMEOUT)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return parse(response.json())
+
+@route('/api/music/lyrics')
+async def get_lyrics(request):
+    artist = request.args.get('artist')
+    title = request.args.get('title')
+    if not artist or not title:
+        return json_response({'error': 'Missing artist or title'}, 400)
+
+    # The lyrics cache is SQLite
+    cached = await asyncio.to_thread(core.cached_lyrics, artist, title)
+    if cached is not None:
+        body, status = cached
+        return json_response(body, status)
+
+    print(f"Looking up lyrics for: {artist} - {title}")
+    source, lyrics, errors = await race_async(
+        [(name, (lambda n=name: lookup_lyrics(n, artist, title))) for name in core.LYRICS_PRIORITY],
+        timeout=core.LYRICS_TIMEOUT + 1,
+        hedge_delay=core.LYRICS_HEDGE_DELAY,
+    )
+    body, status = await asyncio.to_thread(core.finish_lyrics_lookup, artist, title, source, lyrics, errors)
+    return json_response(body, status)
+
+
+# --- Blocking iterators ---
+
+async def iterate_blocking(iterator, executor):
+    """Async iterator over a blocking iterator, advanced one item at a time
+    on executor, so a thread is only held while the next item is produced.
+    Closing it early closes the iterator (after any next() in progress)."""
+    done = object()
+    future = None
+    try:
+        while True:
+            future = executor.submit(next, iterator, done)
+            item = await asyncio.wrap_future(future)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            pending = future
+
+            def finish():
+                # A generator can't be closed while another thread runs it
+                if pending is not None:
+                    wait_futures([pending])
+                close()
+            await asyncio.get_running_loop().run_in_executor(executor, finish)
+
+
+# --- Music ---
+# Extraction itself runs in the yt-dlp worker processes. Only as many
+# threads as there are workers wait on them (extraction_executor); the rest
+# of the queue waits here as coroutines, for at most the pool's queue
+# timeout.
+EXTRACTION_THREADS = core.extractor_pool.size or 2
+extraction_executor = ThreadPoolExecutor(
+    max_workers=EXTRACTION_THREADS,
+    thread_name_prefix='heimdall-asgi-extract',
+)
+_extraction_slots = None
+
+@asynccontextmanager
+async def extraction_slot():
+    """A turn on extraction_executor, or ExtractionTimeout after the pool's
+    queue timeout."""
+    global _extraction_slots
+    if _extraction_slots is None:
+        _extraction_slots = asyncio.Semaphore(EXTRACTION_THREADS)
+    timeout = core.extractor_pool.queue_timeout
+    try:
+        await asyncio.wait_for(_extraction_slots.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise ExtractionTimeout(f"No yt-dlp worker available after {timeout}s")
+    try:
+        yield
+    finally:
+        _extraction_slots.release()
+
+async def run_extraction(fn, *args):
+    async with extraction_slot():
+        return await asyncio.get_running_loop().run_in_executor(extraction_executor, fn, *args)
+
+async def stream_extraction(iterator):
+    """iterate_blocking over an extraction generator, holding a slot (and so
+    at most one executor thread) for the whole stream."""
+    async with extraction_slot():
+        items = iterate_blocking(iterator, extraction_executor)
+        try:
+            async for item in items:
+                yield item
+        finally:
+            await items.aclose()
+
+music_search_flight = AsyncSingleFlight(name='music_search_async')
+
+@route('/api/music/search/<query>')
+async def search_music(request, query):
+    mode, error = core.music_search_mode(request.args)
+    if error:
+        return error_pair_response(error)
+
+    cache_key = (mode, core.normalize_music_query(query))
+    cached = core.music_search_cache.get(cache_key)
+    if cached is not MISSING:
+        return json_response(cached)
+
+    try:
+        results = await music_search_flight.do(
+            cache_key, lambda: run_extraction(core._search_music_and_cache, query, mode, cache_key))
+    except Exception as e:
+        print(f"yt-dlp search error: {e}")
+        results = []
+    return json_response(results)
+
+@route('/api/music/search/<query>/stream')
+async def search_music_stream(request, query):
+    params, error = core.music_search_stream_args(request.args)
+    if error:
+        return error_pair_response(error)
+
+    mode, count = params
+    return StreamingResponse(
+        stream_extraction(core.music_search_lines(query, mode, count)),
+        content_type='application/x-ndjson',
+    )
+
+music_stream_flight = AsyncSingleFlight(name='music_stream_async')
+
+async def get_stream(source, track_id):
+    """Async app.get_stream, sharing its cache."""
+    cached = core.peek_stream(source, track_id)
+    if cached is not MISSING:
+        return cached
+    return await music_stream_flight.do(
+        (source, track_id), lambda: run_extraction(core.get_stream, source, track_id))
+
+@route('/api/music/stream')
+async def get_music_stream(request):
+    source = request.args.get('source')
+    track_id = request.args.get('id')
+    if not source or not track_id:
+        return json_response({'error': 'Missing source or id'}, 400)
+
+    try:
+        stream = await get_stream(source, track_id)
+    except Exception as e:
+        print(f"Stream error: {e}")
+        return json_response({'error': str(e)}, 500)
+    return json_response(core.with_audio_proxy(stream, track_id))
+
+@route('/api/music/stream/batch', methods=('POST',))
+async def get_music_stream_batch(request):
+    if not request.username:
+        return not_logged_in()
+
+    request_data, error = core.stream_batch_request(await request.json())
+    if error:
+        return error_pair_response(error)
+
+    source, track_ids = request_data
+    calls = {track_id: (lambda t=track_id: get_stream(source, t)) for track_id in track_ids}
+    # Resolves that miss the deadline keep running (the single-flight task
+    # is shielded) and land in the stream cache
+    results, errors = await fan_out_async(calls, timeout=core.STREAM_BATCH_TIMEOUT)
+    return json_response(core.stream_batch_payload(results, errors))
+
+# Audio proxy reads (segment cache files and upstream chunks) hold one of
+# these threads per chunk, not per stream
+audio_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('HEIMDALL_AUDIO_THREADS', '4')),
+    thread_name_prefix='heimdall-asgi-audio',
+)
+
+@route('/api/music/audio/<video_id>')
+async def get_music_audio(request, video_id):
+    if not core.AUDIO_PROXY_ENABLED:
+        abort(404)
+    if not request.username:
+        return not_logged_in()
+
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(
+        audio_executor, core.audio_proxy, video_id, request.headers.get('range'))
+    if isinstance(body, dict):
+        return json_response(body, status)
+    headers = dict(headers)
+    content_type = headers.pop('Content-Type', 'text/html; charset=utf-8')
+    return StreamingResponse(iterate_blocking(iter(body), audio_executor), status, content_type, headers)
+
+
+# --- Application ---
+
+class HeimdallASGI:
+    def __init__(self, flask_app, wsgi_threads=8):
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_threads)
+
+    def _match(self, scope):
+        path = scope['path']
+        if not path.startswith('/api/'):
+            return None
+        for pattern, methods, handler in _routes:
+            match = pattern.match(path)
+            if match and scope['method'] in methods:
+                return handler, match.groupdict()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        matched = self._match(scope) if scope['type'] == 'http' else None
+        if matched is None:
+            # Pages, static files, auth, watchlist, the image proxy, and
+            # anything else (e.g. CORS preflights) go to Flask as before
+            await self.wsgi(scope, receive, send)
+            return
+
+        handler, params = matched
+        request = Request(scope, receive)
+        try:
+            response = await handler(request, **params)
+        except HTTPException as e:
+            response = error_response(e)
+        except Exception as e:
+            # Flask answers an unhandled error with a bare 500 page
+            print(f"Error in {request.path}: {e}")
+            response = error_response(InternalServerError())
+        await response.send(send, request)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # aiohttp and requests were kept off the import path; load
+                # them now rather than on the first upstream call
+                startup.warm_in_background()
+                core.start_background_init()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_http.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+asgi_app = HeimdallASGI(
+    core.app,
+    wsgi_threads=core.SERVER_THREADS,
+)
+
+
+def serve(host='127.0.0.1', port=8000):
+    """Run asgi_app under uvicorn (blocking)."""
+    import uvicorn
+    uvicorn.run(asgi_app, host=host, port=port, log_level='warning')
@@ -0,0 +1,104 @@
+"""
+async_http.py
+
+asyncio counterpart of http_client.HttpClient for the ASGI layer, built on
+aiohttp. An upstream request in flight costs a coroutine rather than a
+server thread. Connections are pooled and kept alive, and idempotent GETs
+are retried with exponential backoff on connection errors and transient
+5xx / 429 responses, with the same environment knobs as the sync client.
+
+aiohttp is imported on first use rather than at startup; it is the single
+most expensive import on the cold-start path.
+"""
+import asyncio
+import json
+
+from .http_client import _env_number
+
+
+class AsyncHttpError(Exception):
+    """Connection failure, timeout, or (from raise_for_status) an error status."""
+
+
+class AsyncResponse:
+    """A fully read upstream response, shaped like the requests.Response
+    attributes the routes use."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise AsyncHttpError(f"{self.status_code} error from upstream")
+
+
+class AsyncHttpClient:
+    def __init__(self, max_connections=200, connect_timeout=3.05, read_timeout=10,
+                 retries=2, backoff_factor=0.3,
+                 status_forcelist=(429, 500, 502, 503, 504)):
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = tuple(status_forcelist)
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        import aiohttp
+
+        # aiohttp sessions are bound to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+            )
+            self._loop = loop
+        return self._session
+
+    async def get(self, url, params=None, timeout=None, **kwargs):
+        """GET with retries, returning an AsyncResponse. timeout (seconds)
+        caps the whole request. Like the sync client, the last response is
+        returned rather than raised when retries run out on a retryable
+        status."""
+        import aiohttp
+
+        session = self._get_session()
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        attempt = 0
+        while True:
+            try:
+                async with session.get(url, params=params, **kwargs) as response:
+                    result = AsyncResponse(response.status, response.headers, await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise AsyncHttpError(f"{type(e).__name__}: {e}") from e
+            else:
+                if result.status_code not in self.status_forcelist or attempt >= self.retries:
+                    return result
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+            attempt += 1
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+
+# Process-wide async client, sharing the sync client's timeout/retry settings
+async_http = AsyncHttpClient(
+    max_connections=_env_number('HEIMDALL_ASYNC_HTTP_MAX_CONNECTIONS', 200, int),
+    connect_timeout=_env_number('HEIMDALL_HTTP_CONNECT_TIMEOUT', 3.05),
+    read_timeout=_env_number('HEIMDALL_HTTP_READ_TIMEOUT', 10),
+    retries=_env_number('HEIMDALL_HTTP_RETRIES', 2, int),
+    backoff_factor=_env_number('HEIMDALL_HTTP_BACKOFF', 0.3),
+)
@@ -0,0 +1,124 @@
+"""
+cache.py
+
+Small in-process caches shared by the backend. ResponseCache is a thread-safe
+TTL cache with LRU eviction bounded by the approximate byte size of the
+stored values, so a handful of large responses can't push memory use up
+without limit.
+"""
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# Sentinel returned by ResponseCache.get() when a key is absent or expired.
+# None is a perfectly valid cached value (e.g. negative caching), so callers
+# should compare against MISSING rather than test for truthiness.
+MISSING = object()
+
+
+def estimate_size(value):
+    """Rough byte size of a JSON-like value, used for LRU accounting."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    try:
+        return len(json.dumps(value, separators=(',', ':')))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024, default_ttl=300, name='cache'):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (expires_at, size, value); most recently used entries at the end
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """Return the cached value for key, or MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, key):
+        """Whether key has a live entry, without touching LRU order or the
+        hit/miss counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, key, value, ttl=None, size=None):
+        """Store value under key for ttl seconds. Values larger than the whole
+        cache are not stored at all."""
+        if not self.enabled:
+            return
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl <= 0:
+            return
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        # Caller must hold self._lock
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
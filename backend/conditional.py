@@ -0,0 +1,124 @@
+"""
+conditional.py
+
+Conditional GET and compression for API responses, shared by the Flask
+after_request hook and the ASGI layer. Cacheable JSON gets a strong ETag
+(a hash of the body, unless the route supplied a cheaper version-based
+one) and "private, no-cache", so the browser keeps it and revalidates with
+If-None-Match; an unchanged body costs a 304 instead of a full download.
+Bodies above a size threshold are gzip- or brotli-compressed, and the
+compressed bytes are kept per ETag so repeated polls don't recompress.
+Private or volatile routes keep no-store.
+"""
+import gzip
+import hashlib
+import os
+
+from .cache import ResponseCache, MISSING
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+
+REVALIDATE = 'private, no-cache'
+NO_STORE = 'no-store, no-cache, must-revalidate, max-age=0'
+
+# Prefixes of routes that must never be stored: auth state, internal
+# counters, and signed stream URLs that expire
+NO_STORE_PREFIXES = (
+    '/api/login',
+    '/api/signup',
+    '/api/logout',
+    '/api/current-user',
+    '/api/stats',
+    '/api/music/stream',
+    '/api/music/audio/',
+)
+
+COMPRESS_MIN_BYTES = int(os.getenv('HEIMDALL_COMPRESS_MIN_BYTES', '1024'))
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+_compressed = ResponseCache(
+    max_bytes=int(float(os.getenv('HEIMDALL_COMPRESS_CACHE_MB', '4')) * 1024 * 1024),
+    default_ttl=600,
+    name='compressed',
+)
+
+
+def cache_policy(method, path, status):
+    """REVALIDATE for cacheable API responses, otherwise NO_STORE."""
+    if method not in ('GET', 'HEAD') or status not in (200, 304):
+        return NO_STORE
+    if path.startswith(NO_STORE_PREFIXES):
+        return NO_STORE
+    return REVALIDATE
+
+
+def body_etag(body):
+    """Strong ETag value (unquoted) for a response body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches an unquoted ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate.strip('"') in (etag, encoded_etag(etag, 'gzip'), encoded_etag(etag, 'br')):
+            return True
+    return False
+
+
+def encoded_etag(etag, encoding):
+    """ETag of a compressed representation; each encoding gets its own."""
+    return f'{etag}-{encoding}' if encoding else etag
+
+
+def choose_encoding(accept_encoding, content_type, size):
+    """'br', 'gzip' or None for a body of the given type and size."""
+    if size < COMPRESS_MIN_BYTES or not accept_encoding:
+        return None
+    if not (content_type or '').startswith(COMPRESSIBLE_TYPES):
+        return None
+    return preferred_encoding(accept_encoding, ('br', 'gzip') if brotli is not None else ('gzip',))
+
+
+def preferred_encoding(accept_encoding, available):
+    """First of the available encodings (in preference order) that the
+    Accept-Encoding header allows, or None."""
+    if not accept_encoding:
+        return None
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in accept_encoding.split(',')
+        if not part.strip().endswith(';q=0')
+    }
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(body, encoding, etag):
+    """Compressed body, reused for repeat requests of the same ETag."""
+    key = (etag, encoding)
+    cached = _compressed.get(key)
+    if cached is not MISSING:
+        return cached
+    if encoding == 'br':
+        data = brotli.compress(body, quality=5)
+    else:
+        data = gzip.compress(body, compresslevel=6)
+    _compressed.set(key, data, size=len(data))
+    return data
+
+
+def stats():
+    return _compressed.stats()
@@ -0,0 +1,235 @@
+"""
+fanout.py
+
+Run independent blocking calls (typically upstream HTTP fetches) at the same
+time on a shared thread pool, so composite endpoints wait for the slowest
+call rather than for the sum of all of them. race() is the hedged variant
+for redundant sources: it returns the first useful answer instead of
+waiting for all of them.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('HEIMDALL_FANOUT_WORKERS', '16')),
+    thread_name_prefix='heimdall-fanout',
+)
+
+
+class FanOutTimeout(Exception):
+    """Raised in place of a result when a call misses the fan-out deadline."""
+
+
+def fan_out(calls, timeout=None, executor=None, finish_late=False):
+    """
+    Run calls (a dict of name -> zero-argument callable) concurrently, on
+    the shared pool unless a dedicated executor is given.
+
+    Returns (results, errors): results maps name -> return value for calls
+    that succeeded, errors maps name -> exception for calls that raised or
+    did not finish within timeout seconds. Calls already running at the
+    deadline keep running in the background but their results are
+    discarded; calls still queued are cancelled unless finish_late is True
+    (for calls with useful side effects, such as filling a cache).
+    """
+    results = {}
+    errors = {}
+    if not calls:
+        return results, errors
+
+    # A single call gains nothing from a thread hop
+    if len(calls) == 1 and timeout is None:
+        name, fn = next(iter(calls.items()))
+        try:
+            results[name] = fn()
+        except Exception as e:
+            errors[name] = e
+        return results, errors
+
+    executor = executor or _executor
+    futures = {executor.submit(fn): name for name, fn in calls.items()}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = set(futures)
+
+    while pending:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+    for future in pending:
+        if not finish_late:
+            future.cancel()
+        errors[futures[future]] = FanOutTimeout(f"'{futures[future]}' timed out after {timeout}s")
+
+    return results, errors
+
+
+def run_in_background(fn, *args, executor=None):
+    """Fire-and-forget fn(*args) on the shared pool (or executor).
+    Exceptions are logged."""
+    def _run():
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Background task {getattr(fn, '__name__', fn)} failed: {e}")
+    return (executor or _executor).submit(_run)
+
+
+def race(calls, timeout=None, hedge_delay=0, executor=None):
+    """
+    Hedged lookup over calls, an ordered list of (name, zero-argument
+    callable) in priority order. Each callable returns a value, or None for
+    "no answer". Call i is started after i * hedge_delay seconds unless an
+    answer has already arrived; with hedge_delay=0 they all start at once.
+
+    Returns (name, value, errors) for the first non-None answer, ties going
+    to the higher-priority call, or (None, None, errors) if none answered
+    within timeout seconds. errors maps name -> exception for calls that
+    raised or missed the deadline; a call that answered None is in neither.
+    """
+    errors = {}
+    if not calls:
+        return None, None, errors
+
+    executor = executor or _executor
+    start = time.monotonic()
+    deadline = None if timeout is None else start + timeout
+    priority = {name: i for i, (name, _) in enumerate(calls)}
+    waiting = list(calls)
+    futures = {}
+    pending = set()
+
+    while waiting or pending:
+        now = time.monotonic()
+        # The next call starts when its hedge delay is up, or straight away
+        # if everything started so far has finished without an answer
+        while waiting and (not pending or now >= start + len(futures) * hedge_delay):
+            name, fn = waiting.pop(0)
+            future = executor.submit(fn)
+            futures[future] = name
+            pending.add(future)
+
+        wake = None if deadline is None else deadline
+        if waiting:
+            next_launch = start + len(futures) * hedge_delay
+            wake = next_launch if wake is None else min(wake, next_launch)
+        remaining = None if wake is None else max(0.0, wake - now)
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        answers = []
+        for future in done:
+            name = futures[future]
+            try:
+                value = future.result()
+            except Exception as e:
+                errors[name] = e
+                continue
+            if value is not None:
+                answers.append((priority[name], name, value))
+        if answers:
+            _, name, value = min(answers, key=lambda a: a[0])
+            for future in pending:
+                future.cancel()
+            return name, value, errors
+
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+    for future in pending:
+        future.cancel()
+        errors[futures[future]] = FanOutTimeout(f"'{futures[future]}' timed out after {timeout}s")
+    for name, _ in waiting:
+        errors[name] = FanOutTimeout(f"'{name}' was not started before the {timeout}s deadline")
+    return None, None, errors
+
+
+# --- asyncio variants, for the ASGI layer ---
+# Same contracts as fan_out() and race(), but calls are zero-argument
+# coroutine functions and each one costs a task instead of a pool thread.
+
+async def fan_out_async(calls, timeout=None):
+    """asyncio fan_out(): returns (results, errors)."""
+    results = {}
+    errors = {}
+    if not calls:
+        return results, errors
+
+    tasks = {asyncio.ensure_future(fn()): name for name, fn in calls.items()}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in done:
+        name = tasks[task]
+        try:
+            results[name] = task.result()
+        except Exception as e:
+            errors[name] = e
+    for task in pending:
+        task.cancel()
+        errors[tasks[task]] = FanOutTimeout(f"'{tasks[task]}' timed out after {timeout}s")
+    return results, errors
+
+
+async def race_async(calls, timeout=None, hedge_delay=0):
+    """asyncio race(): returns (name, value, errors)."""
+    errors = {}
+    if not calls:
+        return None, None, errors
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = None if timeout is None else start + timeout
+    priority = {name: i for i, (name, _) in enumerate(calls)}
+    waiting = list(calls)
+    tasks = {}
+    pending = set()
+
+    try:
+        while waiting or pending:
+            now = loop.time()
+            while waiting and (not pending or now >= start + len(tasks) * hedge_delay):
+                name, fn = waiting.pop(0)
+                task = asyncio.ensure_future(fn())
+                tasks[task] = name
+                pending.add(task)
+
+            wake = deadline
+            if waiting:
+                next_launch = start + len(tasks) * hedge_delay
+                wake = next_launch if wake is None else min(wake, next_launch)
+            remaining = None if wake is None else max(0.0, wake - now)
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+            answers = []
+            for task in done:
+                name = tasks[task]
+                try:
+                    value = task.result()
+                except Exception as e:
+                    errors[name] = e
+                    continue
+                if value is not None:
+                    answers.append((priority[name], name, value))
+            if answers:
+                _, name, value = min(answers, key=lambda a: a[0])
+                return name, value, errors
+
+            if deadline is not None and loop.time() >= deadline:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    for task in pending:
+        errors[tasks[task]] = FanOutTimeout(f"'{tasks[task]}' timed out after {timeout}s")
+    for name, _ in waiting:
+        errors[name] = FanOutTimeout(f"'{name}' was not started before the {timeout}s deadline")
+    return None, None, errors
@@ -0,0 +1,39 @@
+"""
+fileutil.py
+
+Small file helpers shared by the on-disk caches and stores.
+"""
+import os
+import tempfile
+
+
+def atomic_write(path, data, fsync=False):
+    """
+    Replace path with data (bytes) so readers see either the old file or
+    the new one, never a partial write. The temp file is made in the same
+    directory (so os.replace stays on one filesystem) with a '.tmp-' prefix
+    that directory scans skip. fsync=True flushes it to disk first, for
+    files that must survive a crash rather than just a concurrent reader.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def touch(path):
+    """Bump path's mtime to now; a missing file is ignored."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
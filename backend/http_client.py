@@ -0,0 +1,109 @@
+"""
+http_client.py
+
+Shared HTTP client for upstream calls (TMDB, lyrics APIs, ...). Each upstream
+host gets its own pooled requests.Session so TCP/TLS connections are kept
+alive and reused across requests instead of re-handshaking on every call.
+Idempotent GETs are retried with exponential backoff on connection errors
+and transient 5xx / 429 responses.
+
+requests (with urllib3 and certifi) is imported when the first session is
+made, not at startup. Code catching its errors can use
+http_client.RequestException, which resolves lazily too.
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+
+def _env_number(name, default, cast=float):
+    try:
+        return cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return cast(default)
+
+
+class HttpClient:
+    def __init__(self, pool_size=10, connect_timeout=3.05, read_timeout=10,
+                 retries=2, backoff_factor=0.3,
+                 status_forcelist=(429, 500, 502, 503, 504)):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = tuple(status_forcelist)
+        # "scheme://host:port" -> requests.Session
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _make_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.status_forcelist,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            # Hand the last response back instead of raising, callers use
+            # raise_for_status() / status_code checks as before
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session_for(self, url):
+        """Return the pooled session for url's host, creating it on first use."""
+        parts = urlsplit(url)
+        host_key = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host_key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host_key)
+                if session is None:
+                    session = self._make_session()
+                    self._sessions[host_key] = session
+        return session
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """GET through the host's pooled session. timeout defaults to the
+        client's (connect, read) pair."""
+        if timeout is None:
+            timeout = self.timeout
+        return self.session_for(url).get(url, params=params, timeout=timeout, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def __getattr__(name):
+    # Lazy module attribute: importing requests just to name its base
+    # exception would defeat the deferred import
+    if name == 'RequestException':
+        import requests
+        return requests.RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Process-wide client used for all upstream calls. Tunable via environment.
+http = HttpClient(
+    pool_size=_env_number('HEIMDALL_HTTP_POOL_SIZE', 10, int),
+    connect_timeout=_env_number('HEIMDALL_HTTP_CONNECT_TIMEOUT', 3.05),
+    read_timeout=_env_number('HEIMDALL_HTTP_READ_TIMEOUT', 10),
+    retries=_env_number('HEIMDALL_HTTP_RETRIES', 2, int),
+    backoff_factor=_env_number('HEIMDALL_HTTP_BACKOFF', 0.3),
+)
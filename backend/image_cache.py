@@ -0,0 +1,131 @@
+"""
+image_cache.py
+
+Content-addressed on-disk cache for proxied images. Each image body is stored
+once under its SHA-256 digest (which doubles as a strong ETag), and a small
+ref file maps the requested URL key to that digest. Blob bytes are capped;
+the least recently served blobs are evicted first; a hit bumps the blob's
+mtime so that order survives a restart. Refs pointing at an evicted blob
+are treated as misses.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .fileutil import atomic_write, touch
+
+
+class ImageCache:
+    def __init__(self, root, max_bytes=256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.blobs_dir = os.path.join(root, 'blobs')
+        self.refs_dir = os.path.join(root, 'refs')
+        # digest -> size, least recently used first
+        self._blobs = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _ensure_loaded(self):
+        # Caller must hold self._lock. Rebuild the LRU order from blob
+        # mtimes once.
+        if self._loaded:
+            return
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        found = []
+        for name in os.listdir(self.blobs_dir):
+            if name.startswith('.'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.blobs_dir, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name, st.st_size))
+        for _, digest, size in sorted(found):
+            self._blobs[digest] = size
+            self._bytes += size
+        self._loaded = True
+
+    def _ref_path(self, key):
+        return os.path.join(self.refs_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def blob_path(self, digest):
+        return os.path.join(self.blobs_dir, digest)
+
+    def lookup(self, key):
+        """Return {'digest', 'content_type'} for a cached key, or None."""
+        with self._lock:
+            self._ensure_loaded()
+        try:
+            with open(self._ref_path(key), 'r') as f:
+                ref = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            ref = None
+
+        with self._lock:
+            if ref is None or ref.get('digest') not in self._blobs:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(ref['digest'])
+            self.hits += 1
+        # The LRU order is rebuilt from mtimes on startup
+        touch(self.blob_path(ref['digest']))
+        return ref
+
+    def store(self, key, data, content_type):
+        """Cache an image body for key. Returns its ref (digest is the ETag)."""
+        digest = hashlib.sha256(data).hexdigest()
+        ref = {'digest': digest, 'content_type': content_type}
+        if not self.enabled or len(data) > self.max_bytes:
+            return ref
+
+        with self._lock:
+            self._ensure_loaded()
+            known = digest in self._blobs
+        try:
+            if not known:
+                atomic_write(self.blob_path(digest), data)
+            atomic_write(self._ref_path(key), json.dumps(ref).encode('utf-8'))
+        except OSError as e:
+            print(f"Failed to cache image {key}: {e}")
+            return ref
+
+        with self._lock:
+            if digest not in self._blobs:
+                self._blobs[digest] = len(data)
+                self._bytes += len(data)
+            self._blobs.move_to_end(digest)
+            evict = []
+            while self._bytes > self.max_bytes and self._blobs:
+                old_digest, size = self._blobs.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                evict.append(self.blob_path(old_digest))
+        for path in evict:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return ref
+
+    def stats(self):
+        with self._lock:
+            return {
+                'blobs': len(self._blobs),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
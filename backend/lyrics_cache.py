@@ -0,0 +1,93 @@
+"""
+lyrics_cache.py
+
+Persistent lyrics cache backed by SQLite in the data dir, so reopening the
+lyrics panel (or restarting the app) doesn't repeat the upstream lookups.
+Entries are keyed by the normalized artist and title. A None lyrics value
+records that no source had the song, and expires sooner so newly published
+lyrics are eventually picked up.
+"""
+import sqlite3
+import threading
+import time
+
+
+class LyricsCache:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS lyrics (
+            artist TEXT NOT NULL,
+            title TEXT NOT NULL,
+            lyrics TEXT,
+            source TEXT,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (artist, title)
+        );
+    """
+
+    def __init__(self, db_path, ttl=30 * 86400, negative_ttl=86400, normalize=None):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.normalize = normalize or (lambda s: ' '.join(s.casefold().split()))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, as in models.watchlist
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _key(self, artist, title):
+        return self.normalize(artist), self.normalize(title)
+
+    def get(self, artist, title):
+        """
+        Return (found, lyrics, source). found is False when there is no
+        usable entry; lyrics is None for a cached "not found".
+        """
+        row = self._connect().execute(
+            'SELECT lyrics, source, fetched_at FROM lyrics WHERE artist = ? AND title = ?',
+            self._key(artist, title),
+        ).fetchone()
+        if row is not None:
+            lyrics, source, fetched_at = row
+            ttl = self.ttl if lyrics is not None else self.negative_ttl
+            if time.time() - fetched_at < ttl:
+                with self._lock:
+                    if lyrics is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                return True, lyrics, source
+        with self._lock:
+            self.misses += 1
+        return False, None, None
+
+    def set(self, artist, title, lyrics, source=None):
+        """Store lyrics for a song; lyrics=None records a miss."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO lyrics (artist, title, lyrics, source, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                self._key(artist, title) + (lyrics, source, time.time()),
+            )
+
+    def stats(self):
+        count = self._connect().execute('SELECT COUNT(*) FROM lyrics').fetchone()[0]
+        with self._lock:
+            return {
+                'entries': count,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+            }
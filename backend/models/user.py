@@ -1,8 +1,13 @@
 import csv
+import hashlib
 import os
 import json
 import sys
-import bcrypt
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..fileutil import atomic_write
+from ..http_client import _env_number
 
 
 def default_data_dir():
@@ -17,8 +22,83 @@ def default_data_dir():
         return os.path.join(base, 'heimdall')
 
 
+class PasswordWorkersBusy(Exception):
+    """Raised when the password hashing pool is saturated. Callers should
+    answer 503 with Retry-After rather than queue the request."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a small dedicated thread pool.
+    At most workers + queue_size jobs are admitted at once; anything beyond
+    that fails fast with PasswordWorkersBusy so a burst of logins can't tie
+    up every server thread. Each admitted job holds its caller's server
+    thread until it finishes, so fit_to_server() caps the admission limit
+    below the server's thread count.
+    """
+
+    # Server threads always left for other requests
+    RESERVED_THREADS = 2
+
+    def __init__(self, workers=2, queue_size=8, rounds=12):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_pending = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='heimdall-bcrypt')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self.rejected = 0
+
+    def fit_to_server(self, server_threads):
+        """Admit fewer jobs than the server has request threads, keeping
+        RESERVED_THREADS of them free. Call before serving requests."""
+        limit = max(1, min(self.workers + self.queue_size, server_threads - self.RESERVED_THREADS))
+        self.max_pending = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordWorkersBusy("Password hashing pool is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def hash(self, password):
+        import bcrypt  # deferred: not needed until the first login/signup
+        return self._run(
+            lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+        )
+
+    def check(self, password, hashed):
+        import bcrypt
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed)
+
+    def needs_rehash(self, hashed):
+        """True if hashed was made with a different cost factor than self.rounds."""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
+
+
+# Shared by every User instance; sized and tuned from the environment
+password_hasher = PasswordHasher(
+    workers=_env_number('HEIMDALL_BCRYPT_WORKERS', 2, int),
+    queue_size=_env_number('HEIMDALL_BCRYPT_QUEUE', 8, int),
+    rounds=_env_number('HEIMDALL_BCRYPT_ROUNDS', 12, int),
+)
+
+
 class User:
-    def __init__(self):
+    def __init__(self, migrate=True):
         # Determine a portable-first data directory.
         # Priority:
         # 1. HEIMDALL_DATA_DIR env var (explicit override)
@@ -49,8 +129,24 @@ class User:
         self.app_data_dir = data_dir
 
         self.file_path = os.path.join(self.app_data_dir, 'users.csv')
-        self.profiles_path = os.path.join(self.app_data_dir, 'profiles.json')
+        # Profiles are sharded into one JSON file per user under profiles/.
+        # The old single profiles.json is only read once, for migration.
+        self.profiles_path = os.path.join(self.app_data_dir, 'profiles')
+        self.legacy_profiles_path = os.path.join(self.app_data_dir, 'profiles.json')
+        self._profile_locks = {}
+        self._profile_locks_guard = threading.Lock()
         self._ensure_files_exist()
+        # migrate=False leaves migrate_legacy_profiles() to the caller, e.g.
+        # to run it off the startup path
+        if migrate:
+            self.migrate_legacy_profiles()
+
+        # In-memory username -> row index over users.csv. It is rebuilt only
+        # when the file's mtime/size change (e.g. edited by hand), so lookups
+        # don't rescan the CSV on every login.
+        self._index = {}
+        self._index_stamp = None
+        self._index_lock = threading.RLock()
 
     def _ensure_files_exist(self):
         if not os.path.exists(self.file_path):
@@ -58,27 +154,81 @@ class User:
                 writer = csv.writer(f)
                 writer.writerow(['username', 'password'])
 
-        if not os.path.exists(self.profiles_path):
-            with open(self.profiles_path, 'w') as f:
-                json.dump({}, f)
+        os.makedirs(self.profiles_path, exist_ok=True)
+
+    def migrate_legacy_profiles(self):
+        """Split a legacy profiles.json into per-user shards (once). The
+        original file is left in place as a backup."""
+        marker = os.path.join(self.profiles_path, '.migrated')
+        if os.path.exists(marker):
+            return
+
+        if os.path.exists(self.legacy_profiles_path):
+            try:
+                with open(self.legacy_profiles_path, 'r') as f:
+                    all_profiles = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f'Failed to read legacy profiles {self.legacy_profiles_path}: {e}')
+                return
+            for username, profiles in all_profiles.items():
+                if not os.path.exists(self._profile_shard(username)):
+                    self.save_profiles(username, profiles)
+            print(f'Migrated profiles for {len(all_profiles)} users from {self.legacy_profiles_path}')
+
+        with open(marker, 'w') as f:
+            f.write(self.legacy_profiles_path)
                 
+    def _file_stamp(self):
+        st = os.stat(self.file_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_index(self):
+        """Return the username index, reloading it if users.csv changed."""
+        stamp = self._file_stamp()
+        if stamp == self._index_stamp:
+            return self._index
+
+        with self._index_lock:
+            stamp = self._file_stamp()
+            if stamp != self._index_stamp:
+                index = {}
+                with open(self.file_path, 'r', newline='') as f:
+                    for row in csv.DictReader(f):
+                        # Last row wins: rehash-on-login appends a newer row
+                        # for an existing user instead of rewriting the file
+                        index[row['username']] = row
+                self._index = index
+                self._index_stamp = stamp
+            return self._index
+
     def create_user(self, username, password):
         if self.get_user(username):
             return False, "Username already exists"
-        
+
+        hashed_password = password_hasher.hash(password)
+
+        with self._index_lock:
+            # Re-check under the lock so concurrent signups can't both succeed
+            if username in self._load_index():
+                return False, "Username already exists"
+            self._append_user_row(username, hashed_password)
+        return True, "User created successfully"
+
+    def _append_user_row(self, username, hashed_password):
+        # Caller must hold self._index_lock
         with open(self.file_path, 'a', newline='') as f:
             writer = csv.writer(f)
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             writer.writerow([username, hashed_password])
-        return True, "User created successfully"
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep the index in sync with our own append instead of reloading
+        # the whole file on the next lookup
+        self._index[username] = {'username': username, 'password': hashed_password}
+        self._index_stamp = self._file_stamp()
 
     def get_user(self, username):
-        with open(self.file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['username'] == username:
-                    return row
-        return None
+        return self._load_index().get(username)
 
     def validate_login(self, username, password):
         user = self.get_user(username)
@@ -87,25 +237,48 @@ class User:
 
         stored = user.get('password', '')
         try:
-            if isinstance(stored, str):
-                stored_bytes = stored.encode('utf-8')
-            else:
-                stored_bytes = stored
-            return bcrypt.checkpw(password.encode('utf-8'), stored_bytes)
+            valid = password_hasher.check(password, stored)
         except (ValueError, TypeError):
             return False
+
+        if valid and password_hasher.needs_rehash(stored):
+            self._rehash(username, password)
+        return valid
+
+    def _rehash(self, username, password):
+        """Re-hash a password at the configured cost after a successful login."""
+        try:
+            hashed_password = password_hasher.hash(password)
+        except PasswordWorkersBusy:
+            # Not worth failing a valid login over; try again next time
+            return
+        with self._index_lock:
+            self._append_user_row(username, hashed_password)
     
+    def _profile_shard(self, username):
+        # Hash the name so any username maps to a safe, case-distinct filename
+        digest = hashlib.sha256(username.encode('utf-8')).hexdigest()
+        return os.path.join(self.profiles_path, f'{digest}.json')
+
+    def _profile_lock(self, username):
+        with self._profile_locks_guard:
+            lock = self._profile_locks.get(username)
+            if lock is None:
+                lock = self._profile_locks[username] = threading.Lock()
+            return lock
+
     def get_profiles(self, username):
-        with open(self.profiles_path, 'r') as f:
-            profiles = json.load(f)
-            return profiles.get(username, [])
+        try:
+            with open(self._profile_shard(username), 'r') as f:
+                return json.load(f).get('profiles', [])
+        except FileNotFoundError:
+            return []
 
     def save_profiles(self, username, profiles):
-        with open(self.profiles_path, 'r') as f:
-            all_profiles = json.load(f)
-        
-        all_profiles[username] = profiles
-        
-        with open(self.profiles_path, 'w') as f:
-            json.dump(all_profiles, f)
+        """Atomically replace one user's profiles. Only that user's lock is
+        held, so saves for different users run in parallel."""
+        shard = self._profile_shard(username)
+        with self._profile_lock(username):
+            data = json.dumps({'username': username, 'profiles': profiles}).encode('utf-8')
+            atomic_write(shard, data, fsync=True)
         return True
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+
+class Watchlist:
+    """
+    Watchlist storage backed by SQLite. Items are rows keyed by
+    (username, profile, item_id), so adding or removing an item touches a
+    single row instead of rewriting every user's watchlist.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS watchlist (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            item TEXT NOT NULL,
+            UNIQUE (username, profile, item_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_watchlist_owner
+            ON watchlist (username, profile, seq);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+        if legacy_json_path:
+            self._migrate_json(legacy_json_path)
+
+    def _connect(self):
+        # sqlite3 connections can't be shared across threads, so each
+        # waitress thread gets its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json(self, json_path):
+        """One-time import of the legacy watchlist.json ({"user:profile": [items]}).
+        The JSON file is left in place as a backup."""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        if not os.path.exists(json_path):
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', 'none')")
+            return
+
+        try:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f'Failed to read legacy watchlist {json_path}: {e}')
+            return
+
+        rows = []
+        for user_key, items in data.items():
+            username, _, profile = user_key.partition(':')
+            for item in items or []:
+                if isinstance(item, dict) and 'id' in item:
+                    rows.append((username, profile or 'default', item['id'], json.dumps(item)))
+
+        with conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO watchlist (username, profile, item_id, item) VALUES (?, ?, ?, ?)',
+                rows,
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,))
+        print(f'Migrated {len(rows)} watchlist items from {json_path}')
+
+    def get_items(self, username, profile):
+        rows = self._connect().execute(
+            'SELECT item FROM watchlist WHERE username = ? AND profile = ? ORDER BY seq',
+            (username, profile),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def version(self, username, profile):
+        """
+        Opaque version of a profile's watchlist, usable as an ETag. seq only
+        ever grows and items are never updated in place, so (max seq, count)
+        changes on every add or remove. The owner is hashed in so two users'
+        lists never share a version.
+        """
+        max_seq, count = self._connect().execute(
+            'SELECT MAX(seq), COUNT(*) FROM watchlist WHERE username = ? AND profile = ?',
+            (username, profile),
+        ).fetchone()
+        owner = hashlib.sha1(f'{username}:{profile}'.encode('utf-8')).hexdigest()[:12]
+        return f'wl-{owner}-{max_seq or 0}-{count}'
+
+    def add_item(self, username, profile, item):
+        """Returns True if the item was added, False if it was already there."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO watchlist (username, profile, item_id, item) VALUES (?, ?, ?, ?)',
+                (username, profile, item['id'], json.dumps(item)),
+            )
+        return cursor.rowcount > 0
+
+    def remove_item(self, username, profile, item_id):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'DELETE FROM watchlist WHERE username = ? AND profile = ? AND item_id = ?',
+                (username, profile, item_id),
+            )
+        return cursor.rowcount > 0
+
+    def delete_profile(self, username, profile):
+        """Remove every item for a profile. Returns True if anything was deleted."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'DELETE FROM watchlist WHERE username = ? AND profile = ?',
+                (username, profile),
+            )
+        return cursor.rowcount > 0
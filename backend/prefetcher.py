@@ -0,0 +1,111 @@
+"""
+prefetcher.py
+
+Next-page prefetch for paginated upstream lists (discover). When page N of a
+filter set is served, page N+1 is fetched in the background into a small,
+short-lived cache, so "load more" is answered without an upstream round
+trip. Page N+2 is added only once the user is actually consuming prefetched
+pages (the page just served was itself a prefetch hit).
+
+Traffic stays bounded: prefetches are only ever triggered by a real request,
+never by other prefetches, so an idle filter set costs nothing; at most
+max_inflight prefetches run at once (extra ones are dropped, not queued);
+and unused pages simply expire after ttl seconds.
+"""
+import threading
+
+from .cache import ResponseCache, MISSING
+
+
+class PagePrefetcher:
+    def __init__(self, key, depth=2, ttl=120, max_bytes=4 * 1024 * 1024,
+                 max_inflight=4, max_page=500, name='prefetch'):
+        """
+        key: callable(endpoint, params) -> cache key for a page request,
+            matching the key the page fetcher stores under.
+        depth: pages ahead to prefetch once pagination is under way (0
+            disables prefetching).
+        max_page: highest page the upstream will serve (TMDB caps at 500).
+        """
+        self.key = key
+        self.depth = depth
+        self.max_page = max_page
+        self.max_inflight = max_inflight
+        self.name = name
+        self.cache = ResponseCache(max_bytes=max_bytes, default_ttl=ttl, name=name)
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.hits = 0
+        self.dropped = 0
+        self.failures = 0
+
+    @property
+    def enabled(self):
+        return self.depth > 0 and self.cache.enabled
+
+    def take(self, endpoint, params):
+        """A prefetched page for (endpoint, params), or MISSING. Each page is
+        handed out once; the caller promotes it into its long-lived cache."""
+        if not self.enabled:
+            return MISSING
+        key = self.key(endpoint, params)
+        data = self.cache.get(key)
+        if data is not MISSING:
+            self.cache.delete(key)
+            with self._lock:
+                self.hits += 1
+        return data
+
+    def plan(self, endpoint, params, data, hit, is_cached):
+        """
+        Pages to prefetch after serving (endpoint, params) -> data: a list
+        of params dicts, each already reserved as in flight (call done() for
+        each when its fetch finishes, successful or not).
+
+        hit: whether the page just served came from a prefetch.
+        is_cached: callable(key) -> bool, for pages already in the caller's
+            own cache, which are skipped.
+        """
+        if not self.enabled:
+            return []
+        try:
+            page = int(params.get('page', 1))
+            total = int(data.get('total_pages') or 1)
+        except (TypeError, ValueError, AttributeError):
+            return []
+
+        ahead = self.depth if hit else 1
+        last = min(page + ahead, total, self.max_page)
+        planned = []
+        with self._lock:
+            for next_page in range(page + 1, last + 1):
+                next_params = dict(params, page=str(next_page))
+                key = self.key(endpoint, next_params)
+                if key in self._inflight or self.cache.contains(key) or is_cached(key):
+                    continue
+                if len(self._inflight) >= self.max_inflight:
+                    self.dropped += 1
+                    break
+                self._inflight.add(key)
+                self.scheduled += 1
+                planned.append(next_params)
+        return planned
+
+    def done(self, endpoint, params, failed=False):
+        with self._lock:
+            self._inflight.discard(self.key(endpoint, params))
+            if failed:
+                self.failures += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'depth': self.depth,
+                'inflight': len(self._inflight),
+                'scheduled': self.scheduled,
+                'hits': self.hits,
+                'dropped': self.dropped,
+                'failures': self.failures,
+                'cache': self.cache.stats(),
+            }
@@ -0,0 +1,185 @@
+"""
+refresher.py
+
+Stale-while-revalidate store for slow-moving catalog endpoints. A background
+thread keeps the last good copy of each warmed endpoint; requests are always
+answered from that copy and a stale copy only schedules a refresh. If the
+upstream is down the last good copy keeps being served, and callers are told
+how stale it is so they can flag it in the response.
+"""
+import threading
+import time
+
+
+class CatalogRefresher:
+    def __init__(self, fetch, endpoints, interval=600, name='refresher'):
+        """
+        fetch: callable(endpoint) -> data, going to the upstream (not a cache).
+        endpoints: endpoints to keep warm.
+        interval: seconds after which a copy is considered stale.
+        """
+        self.fetch = fetch
+        self.endpoints = list(endpoints)
+        self.interval = interval
+        self.name = name
+        # endpoint -> (data, fetched_at)
+        self._store = {}
+        # endpoint -> time of the last refresh attempt, successful or not
+        self._attempted = {}
+        # endpoint -> Event set when the background refresh under way ends
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        self.stale_served = 0
+
+    @property
+    def enabled(self):
+        return self.interval > 0 and bool(self.endpoints)
+
+    def handles(self, endpoint):
+        return self.enabled and endpoint in self.endpoints
+
+    def start(self):
+        """Start the background thread (idempotent). The first pass warms
+        every endpoint that has no copy and isn't being fetched inline."""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f'heimdall-{self.name}', daemon=True)
+            self._thread.start()
+
+    def get(self, endpoint):
+        """
+        Return (data, stale_seconds) for a warmed endpoint. stale_seconds is 0
+        while the copy is fresh. With no copy yet the endpoint is fetched
+        inline and any upstream error propagates.
+        """
+        cached = self.peek(endpoint)
+        if cached is None and self.wait(endpoint):
+            cached = self.peek(endpoint)
+        if cached is not None:
+            return cached
+        data = self._refresh(endpoint, raise_errors=True)
+        return data, 0
+
+    def wait(self, endpoint, timeout=None):
+        """Block until the background refresh of endpoint that is under way
+        finishes. Returns False if there is none (or on timeout)."""
+        with self._lock:
+            done = self._inflight.get(endpoint)
+        if done is None:
+            return False
+        return done.wait(timeout)
+
+    def peek(self, endpoint):
+        """
+        Non-blocking get(): (data, stale_seconds) from the current copy, or
+        None if there is none yet. For async callers, which fetch the first
+        copy themselves and hand it over with put(), after wait()ing out a
+        background refresh that is already fetching it.
+        """
+        with self._lock:
+            entry = self._store.get(endpoint)
+            if entry is None and endpoint not in self._inflight:
+                # The caller fetches it inline now; count that as an attempt
+                # so the background pass doesn't fetch it a second time.
+                # Marked before start() so the first pass already sees it.
+                self._attempted[endpoint] = time.time()
+        self.start()
+        if entry is None:
+            return None
+
+        data, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < self.interval:
+            return data, 0
+
+        self.schedule(endpoint)
+        with self._lock:
+            self.stale_served += 1
+        return data, int(age)
+
+    def put(self, endpoint, data):
+        """Store a copy fetched elsewhere, as a successful refresh would."""
+        with self._lock:
+            self._store[endpoint] = (data, time.time())
+            self._attempted[endpoint] = time.time()
+
+    def schedule(self, endpoint):
+        """Ask the background thread to refresh stale copies now."""
+        self._wake.set()
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'endpoints': {
+                    endpoint: round(now - entry[1], 1)
+                    for endpoint, entry in self._store.items()
+                },
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'stale_served': self.stale_served,
+            }
+
+    def _refresh(self, endpoint, raise_errors=False):
+        with self._lock:
+            self._attempted[endpoint] = time.time()
+        try:
+            data = self.fetch(endpoint)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            print(f"Refresh of {endpoint} failed: {e}")
+            if raise_errors:
+                raise
+            return None
+
+        with self._lock:
+            self._store[endpoint] = (data, time.time())
+            self.refreshes += 1
+        return data
+
+    def _next_due(self, endpoint, now):
+        # Caller must hold self._lock. Fresh copies are due when they go
+        # stale; missing or stale ones are retried at most every retry_after
+        # seconds so a TMDB outage doesn't turn into a refresh storm.
+        retry_after = min(self.interval, 30)
+        entry = self._store.get(endpoint)
+        if entry is not None and now - entry[1] < self.interval:
+            return entry[1] + self.interval
+        return self._attempted.get(endpoint, 0) + retry_after
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                due = [e for e in self.endpoints if self._next_due(e, now) <= now]
+
+            for endpoint in due:
+                # due was computed before this pass; skip endpoints a request
+                # has claimed (peek) or stored (put/get) since
+                with self._lock:
+                    now = time.time()
+                    if self._next_due(endpoint, now) > now:
+                        continue
+                    self._attempted[endpoint] = now
+                    done = self._inflight[endpoint] = threading.Event()
+                try:
+                    self._refresh(endpoint)
+                finally:
+                    with self._lock:
+                        del self._inflight[endpoint]
+                    done.set()
+
+            now = time.time()
+            with self._lock:
+                next_due = min(self._next_due(e, now) for e in self.endpoints)
+            self._wake.wait(max(1.0, next_due - now))
+            self._wake.clear()
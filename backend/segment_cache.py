@@ -0,0 +1,210 @@
+"""
+segment_cache.py
+
+On-disk cache for byte ranges of large upstream objects (audio streams).
+Objects are split into fixed-size, aligned segments stored as individual
+files, so a Range request can be served from whatever segments are already
+on disk and only the missing runs are fetched upstream. Total size is
+capped; the least recently used segments are evicted first, and reads bump
+a segment's mtime so that order survives a restart.
+"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from .fileutil import atomic_write, touch
+
+
+class SegmentCache:
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, segment_size=256 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.segment_size = segment_size
+        # (key, index) -> size, least recently used first
+        self._segments = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- index ---
+
+    def _ensure_loaded(self):
+        # Caller must hold self._lock. Rebuild the LRU index from disk once,
+        # oldest files first.
+        if self._loaded:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        found = []
+        for key in os.listdir(self.root):
+            obj_dir = os.path.join(self.root, key)
+            if not os.path.isdir(obj_dir):
+                continue
+            for name in os.listdir(obj_dir):
+                if not name.endswith('.seg'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(obj_dir, name))
+                    found.append((st.st_mtime, key, int(name[:-4]), st.st_size))
+                except (OSError, ValueError):
+                    continue
+        for _, key, index, size in sorted(found):
+            self._segments[(key, index)] = size
+            self._bytes += size
+        self._loaded = True
+
+    def _segment_path(self, key, index):
+        return os.path.join(self.root, key, f'{index}.seg')
+
+    def has_segment(self, key, index):
+        with self._lock:
+            self._ensure_loaded()
+            return (key, index) in self._segments
+
+    # --- metadata ---
+
+    def get_meta(self, key):
+        try:
+            with open(os.path.join(self.root, key, 'meta.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def set_meta(self, key, meta):
+        obj_dir = os.path.join(self.root, key)
+        os.makedirs(obj_dir, exist_ok=True)
+        atomic_write(os.path.join(obj_dir, 'meta.json'), json.dumps(meta).encode('utf-8'))
+
+    def drop(self, key):
+        """Forget every segment of an object, e.g. when upstream changed it."""
+        with self._lock:
+            self._ensure_loaded()
+            for seg_key in [k for k in self._segments if k[0] == key]:
+                self._bytes -= self._segments.pop(seg_key)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    # --- segments ---
+
+    def read_segment(self, key, index):
+        with self._lock:
+            self._ensure_loaded()
+            if (key, index) not in self._segments:
+                self.misses += 1
+                return None
+            self._segments.move_to_end((key, index))
+            self.hits += 1
+        path = self._segment_path(key, index)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                size = self._segments.pop((key, index), 0)
+                self._bytes -= size
+            return None
+        # The LRU order is rebuilt from mtimes on startup
+        touch(path)
+        return data
+
+    def write_segment(self, key, index, data):
+        if len(data) > self.max_bytes:
+            return
+        obj_dir = os.path.join(self.root, key)
+        os.makedirs(obj_dir, exist_ok=True)
+        try:
+            atomic_write(self._segment_path(key, index), data)
+        except OSError as e:
+            print(f"Failed to cache segment {key}/{index}: {e}")
+            return
+
+        with self._lock:
+            self._ensure_loaded()
+            old = self._segments.pop((key, index), None)
+            if old is not None:
+                self._bytes -= old
+            self._segments[(key, index)] = len(data)
+            self._bytes += len(data)
+            evict = []
+            while self._bytes > self.max_bytes and self._segments:
+                (old_key, old_index), size = self._segments.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                evict.append(self._segment_path(old_key, old_index))
+        for path in evict:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # --- ranges ---
+
+    def iter_range(self, key, start, end, total, fetch):
+        """
+        Yield the bytes start..end (inclusive) of an object of size total.
+        Cached segments are read from disk; each run of missing segments is
+        requested with fetch(byte_start, byte_end), which must return an
+        iterator of chunks. Fetched segments are cached as they complete, so
+        at most one segment is held in memory. If fetch ends early, iteration
+        stops there, so callers can compare the byte count with end - start + 1.
+        """
+        size = self.segment_size
+
+        def clip(data, index):
+            offset = index * size
+            return data[max(start - offset, 0):min(end - offset + 1, len(data))]
+
+        index = start // size
+        last = end // size
+        while index <= last:
+            data = self.read_segment(key, index)
+            if data is not None:
+                yield clip(data, index)
+                index += 1
+                continue
+
+            run_end = index
+            while run_end < last and not self.has_segment(key, run_end + 1):
+                run_end += 1
+            byte_start = index * size
+            byte_end = min((run_end + 1) * size, total) - 1
+
+            buf = bytearray()
+            seg = index
+            for chunk in fetch(byte_start, byte_end):
+                buf += chunk
+                while len(buf) >= size:
+                    data = bytes(buf[:size])
+                    del buf[:size]
+                    self.write_segment(key, seg, data)
+                    yield clip(data, seg)
+                    seg += 1
+            if buf:
+                data = bytes(buf)
+                # Only the object's final segment may legitimately be short
+                if seg * size + len(data) != total:
+                    # Upstream ended mid-segment; stop rather than skip the
+                    # missing bytes and carry on with the next segment
+                    yield clip(data, seg)
+                    return
+                self.write_segment(key, seg, data)
+                yield clip(data, seg)
+                seg += 1
+            if seg <= run_end:
+                # Upstream ended early; don't loop forever re-requesting
+                return
+            index = run_end + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'segments': len(self._segments),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
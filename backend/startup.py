@@ -0,0 +1,174 @@
+"""
+startup.py
+
+Cold-start accounting. Importing this module starts the clock; while the app
+module loads, every import statement that pulls in a new module is timed
+(cumulatively, so 'flask' includes werkzeug and jinja2), and initialization
+steps can be timed with phase(). mark() records milestones such as the app
+being imported or the server accepting connections. The resulting report is
+printed once at startup, served under /api/stats, and can be produced on its
+own with `python -m backend.startup [--json FILE]` to compare releases.
+
+warm_in_background() imports modules that were deliberately left out of the
+startup path (aiohttp, requests) on a daemon thread once the server is up, so
+the first request doesn't pay for them either.
+"""
+import builtins
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+_started = time.perf_counter()
+_lock = threading.Lock()
+# module name -> cumulative seconds, for imports made while tracking
+_imports = {}
+# name -> seconds, for timed initialization steps
+_phases = {}
+# name -> seconds since start
+_marks = {}
+_state = threading.local()
+_original_import = builtins.__import__
+_tracking = False
+_warm_started = False
+
+# Imported on a background thread once the server is listening
+DEFERRED_IMPORTS = ('requests', 'aiohttp')
+
+
+def _resolve(name, globals_, level):
+    if level == 0:
+        return name
+    package = (globals_ or {}).get('__package__') or ''
+    base = package.rsplit('.', level - 1)[0] if level > 1 else package
+    return f'{base}.{name}' if name else base
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only the outermost import of a module that isn't loaded yet is timed;
+    # nested imports are part of their parent's time.
+    depth = getattr(_state, 'depth', 0)
+    full_name = _resolve(name, globals, level) if depth == 0 else None
+    if full_name is None or full_name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _state.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        _state.depth = depth
+        with _lock:
+            _imports[full_name] = _imports.get(full_name, 0.0) + elapsed
+
+
+def track_imports():
+    """Start timing imports (call before the app's own imports)."""
+    global _tracking
+    with _lock:
+        if _tracking:
+            return
+        _tracking = True
+    builtins.__import__ = _timed_import
+
+
+def stop_tracking_imports():
+    global _tracking
+    with _lock:
+        _tracking = False
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _original_import
+
+
+@contextmanager
+def phase(name):
+    """Time an initialization step."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases[name] = time.perf_counter() - start
+
+
+def mark(name):
+    """Record a milestone (seconds since this module was imported). Only the
+    first mark of a name counts."""
+    with _lock:
+        _marks.setdefault(name, time.perf_counter() - _started)
+
+
+def report(top=15):
+    """Milestones, phases and the slowest imports, in milliseconds."""
+    def ms(seconds):
+        return round(seconds * 1000, 1)
+
+    with _lock:
+        imports = sorted(_imports.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'marks_ms': {name: ms(t) for name, t in sorted(_marks.items(), key=lambda item: item[1])},
+            'phases_ms': {name: ms(t) for name, t in _phases.items()},
+            'imports_ms': {name: ms(t) for name, t in imports[:top]},
+            'imports_total_ms': ms(sum(t for _, t in imports)),
+        }
+
+
+def summary():
+    """One line for the console."""
+    data = report(top=5)
+    marks = ', '.join(f'{name} {t:.0f}ms' for name, t in data['marks_ms'].items())
+    slowest = ', '.join(f'{name} {t:.0f}ms' for name, t in data['imports_ms'].items())
+    return f"Startup: {marks} (slowest imports: {slowest})"
+
+
+def _warm():
+    for module in DEFERRED_IMPORTS:
+        start = time.perf_counter()
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        with _lock:
+            _phases[f'warm {module}'] = time.perf_counter() - start
+
+
+def warm_in_background():
+    """Import the deferred modules on a daemon thread (idempotent)."""
+    global _warm_started
+    with _lock:
+        if _warm_started:
+            return
+        _warm_started = True
+    threading.Thread(target=_warm, name='heimdall-warm-imports', daemon=True).start()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report Heimdall backend cold-start timings.')
+    parser.add_argument('--json', metavar='FILE', help='also write the report to FILE')
+    parser.add_argument('--top', type=int, default=25, help='number of imports to list')
+    args = parser.parse_args(argv)
+
+    # Run as a script this file is __main__; the app records into the
+    # backend.startup module it imports itself
+    import importlib
+    importlib.import_module('backend.app')
+    from backend import startup as recorded
+
+    data = recorded.report(top=args.top)
+    for section in ('marks_ms', 'phases_ms', 'imports_ms'):
+        print(section[:-3])
+        for name, value in data[section].items():
+            print(f'  {value:9.1f} ms  {name}')
+    print(f"imports total: {data['imports_total_ms']:.1f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+static_assets.py
+
+Fingerprinted, precompressed serving of the frontend's js/css/assets files.
+Each file is hashed once and gets a content-addressed URL
+(js/music.js -> js/music.3f2a9c1b0d.js) that templates reference through
+asset_url(), so it can be cached as immutable for a year and a changed file
+simply gets a new name. Bodies are kept in memory up to a byte budget, and
+compressible ones are precompressed (gzip, plus brotli when installed), so a
+request costs no disk stat, read or compression. Unhashed URLs still work
+and are served with an ETag and "no-cache" so they revalidate.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from .conditional import etag_matches, encoded_etag, preferred_encoding, brotli
+
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.ico', '.json', '.txt', '.map')
+
+# name.<10 hex>.ext -> (name.ext, hash)
+FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<ext>\.[^./]+)$')
+
+
+class StaticAsset:
+    __slots__ = ('path', 'digest', 'content_type', 'size', 'mtime', 'data', 'variants')
+
+    def __init__(self, path, digest, content_type, size, mtime, data):
+        self.path = path
+        self.digest = digest
+        self.content_type = content_type
+        self.size = size
+        self.mtime = mtime
+        # None when over the memory budget; read from disk per request
+        self.data = data
+        # encoding -> compressed bytes, only kept when smaller than data
+        self.variants = {}
+
+    def footprint(self):
+        """Bytes this asset holds in memory."""
+        if self.data is None:
+            return 0
+        return self.size + sum(len(body) for body in self.variants.values())
+
+
+class StaticAssets:
+    def __init__(self, root, subdirs=('js', 'css', 'assets'),
+                 max_bytes=32 * 1024 * 1024, reload=False):
+        self.root = root
+        self.subdirs = subdirs
+        self.max_bytes = max_bytes
+        # Re-stat files on each lookup so edits show up without a restart
+        self.reload = reload
+        # 'js/app.js' -> StaticAsset
+        self._assets = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.disk_reads = 0
+        self.not_modified = 0
+
+    # --- build ---
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for subdir in self.subdirs:
+                base = os.path.join(self.root, subdir)
+                for dirpath, _, filenames in os.walk(base):
+                    for name in filenames:
+                        full = os.path.join(dirpath, name)
+                        rel = os.path.relpath(full, self.root).replace(os.sep, '/')
+                        self._load(rel)
+            self._loaded = True
+
+    def _load(self, rel):
+        # Caller must hold self._lock (or be the only thread, during build)
+        full = os.path.join(self.root, *rel.split('/'))
+        try:
+            st = os.stat(full)
+            with open(full, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Failed to load static asset {rel}: {e}")
+            return None
+
+        old = self._assets.get(rel)
+        if old is not None:
+            self._bytes -= old.footprint()
+
+        content_type = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        keep = self._bytes + len(data) <= self.max_bytes
+        asset = StaticAsset(
+            path=full,
+            digest=hashlib.sha256(data).hexdigest(),
+            content_type=content_type,
+            size=len(data),
+            mtime=st.st_mtime,
+            data=data if keep else None,
+        )
+        if keep:
+            self._bytes += len(data)
+            if rel.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self._precompress(asset)
+        self._assets[rel] = asset
+        return asset
+
+    def _precompress(self, asset):
+        candidates = {'gzip': gzip.compress(asset.data, compresslevel=9)}
+        if brotli is not None:
+            candidates['br'] = brotli.compress(asset.data, quality=11)
+        for encoding, body in candidates.items():
+            if len(body) < asset.size:
+                asset.variants[encoding] = body
+                self._bytes += len(body)
+
+    def _refresh(self, rel, asset):
+        try:
+            mtime = os.stat(asset.path).st_mtime
+        except OSError:
+            return asset
+        if mtime == asset.mtime:
+            return asset
+        with self._lock:
+            return self._load(rel) or asset
+
+    def warm(self):
+        """Hash, load and precompress everything now rather than on the
+        first request."""
+        self._ensure_loaded()
+
+    # --- lookup ---
+
+    def get(self, rel):
+        """StaticAsset for a path like 'js/app.js', or None."""
+        self._ensure_loaded()
+        asset = self._assets.get(rel)
+        if asset is not None and self.reload:
+            asset = self._refresh(rel, asset)
+        return asset
+
+    def url(self, rel):
+        """Fingerprinted URL for a logical path, for use in templates.
+        Unknown paths are returned unchanged (as an absolute URL)."""
+        rel = rel.lstrip('/')
+        asset = self.get(rel)
+        if asset is None:
+            return '/' + rel
+        head, _, name = rel.rpartition('/')
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{asset.digest[:10]}{ext}'
+        return f'/{head}/{hashed}' if head else f'/{hashed}'
+
+    def resolve(self, subdir, filename):
+        """(asset, fingerprinted) for a requested file. fingerprinted is True
+        only when the URL carries the asset's current hash."""
+        match = FINGERPRINT_RE.match(filename.rsplit('/', 1)[-1])
+        if match:
+            head = filename.rpartition('/')[0]
+            logical = match.group('stem') + match.group('ext')
+            rel = f"{subdir}/{head + '/' if head else ''}{logical}"
+            asset = self.get(rel)
+            if asset is not None:
+                return asset, asset.digest.startswith(match.group('hash'))
+        return self.get(f'{subdir}/{filename}'), False
+
+    # --- serving ---
+
+    def response(self, subdir, filename, request, response_class):
+        """Build the response for /<subdir>/<filename>, or None for 404.
+        An outdated hash still gets the current file, just not as immutable."""
+        asset, fingerprinted = self.resolve(subdir, filename)
+        if asset is None:
+            return None
+
+        etag = asset.digest[:32]
+        headers = {
+            'Cache-Control': IMMUTABLE if fingerprinted else REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            self.not_modified += 1
+            headers['ETag'] = f'"{etag}"'
+            return response_class(status=304, headers=headers)
+
+        body = asset.data
+        if body is None:
+            self.disk_reads += 1
+            try:
+                with open(asset.path, 'rb') as f:
+                    body = f.read()
+            except OSError:
+                return None
+        else:
+            self.hits += 1
+
+        encoding = preferred_encoding(
+            request.headers.get('Accept-Encoding'),
+            [e for e in ('br', 'gzip') if e in asset.variants],
+        )
+        if encoding is not None:
+            body = asset.variants[encoding]
+            headers['Content-Encoding'] = encoding
+        headers['ETag'] = f'"{encoded_etag(etag, encoding)}"'
+        return response_class(body, status=200, headers=headers, content_type=asset.content_type)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._assets),
+                'in_memory': sum(1 for a in self._assets.values() if a.data is not None),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_reads': self.disk_reads,
+                'not_modified': self.not_modified,
+            }
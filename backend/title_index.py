@@ -0,0 +1,238 @@
+"""
+title_index.py
+
+In-memory prefix index of movie and TV titles for instant search
+suggestions. It is filled from every TMDB response the backend fetches
+(catalog lists, discover pages, details with their recommendations, search
+results), so titles the user has browsed past can be suggested without an
+upstream round trip. Titles are kept as a sorted array of normalized keys,
+one per word start ("the dark knight", "dark knight", "knight"), so both
+leading and mid-title prefixes match with a bisect. The index is capped at
+max_titles (least recently seen dropped first) and snapshotted to a JSON
+file, written in the background at most every save_interval seconds.
+"""
+import bisect
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from .fileutil import atomic_write
+
+
+# Fields kept per title: enough to render a search suggestion
+KEPT_FIELDS = (
+    'id', 'media_type', 'title', 'name', 'original_title', 'original_name',
+    'poster_path', 'backdrop_path', 'release_date', 'first_air_date',
+    'popularity', 'vote_average',
+)
+
+# Word starts indexed per title; later words rarely help typeahead
+MAX_WORD_KEYS = 6
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+DETAILS_ENDPOINT_RE = re.compile(r'^/(movie|tv)/\d+$')
+
+
+def normalize_title(text):
+    """Lowercase, accent-free, punctuation collapsed to single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+def media_type_for(endpoint, item):
+    """'movie' / 'tv' for a result item, from its own media_type or else the
+    endpoint it came from. None for people and anything unrecognized."""
+    media_type = item.get('media_type')
+    if media_type:
+        return media_type if media_type in ('movie', 'tv') else None
+    for part in endpoint.strip('/').split('/'):
+        if part in ('movie', 'tv'):
+            return part
+    return None
+
+
+class TitleIndex:
+    def __init__(self, path, max_titles=20000, save_interval=60, background=None):
+        self.path = path
+        self.max_titles = max_titles
+        self.save_interval = save_interval
+        # Callable used to run saves off the request path (e.g.
+        # fanout.run_in_background); saves run inline when None
+        self.background = background
+        # (media_type, id) -> item, least recently seen first
+        self._items = OrderedDict()
+        # Sorted (key, media_type, id, word position) tuples
+        self._keys = []
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._saving = False
+        self._last_save = time.monotonic()
+        self.lookups = 0
+        self.added = 0
+
+    # --- persistence ---
+
+    def _ensure_loaded(self):
+        # Caller must hold self._lock
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Failed to load title index {self.path}: {e}")
+            return
+        for item in items:
+            if isinstance(item, dict) and 'media_type' in item and 'id' in item:
+                self._put(item)
+
+    def save(self):
+        """Write a snapshot now if anything changed since the last one."""
+        with self._lock:
+            if not self._dirty:
+                self._saving = False
+                return
+            snapshot = list(self._items.values())
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+        except OSError as e:
+            print(f"Failed to save title index {self.path}: {e}")
+            with self._lock:
+                self._dirty = True
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def _schedule_save(self):
+        # Caller must hold self._lock
+        if self._saving or time.monotonic() - self._last_save < self.save_interval:
+            return False
+        self._saving = True
+        return True
+
+    # --- updates ---
+
+    def _title_keys(self, item):
+        """Sorted-array entries for an item: (key, media_type, id, word
+        position), where position 0 is the start of a title."""
+        keys = {}
+        for field in ('title', 'name', 'original_title', 'original_name'):
+            words = normalize_title(item.get(field)).split()
+            for i in range(min(len(words), MAX_WORD_KEYS)):
+                key = ' '.join(words[i:])
+                keys[key] = min(i, keys.get(key, i))
+        ident = (item['media_type'], item['id'])
+        return [(key,) + ident + (pos,) for key, pos in keys.items()]
+
+    def _drop_keys(self, item):
+        for entry in self._title_keys(item):
+            i = bisect.bisect_left(self._keys, entry)
+            if i < len(self._keys) and self._keys[i] == entry:
+                del self._keys[i]
+
+    def _put(self, item):
+        # Caller must hold self._lock. Returns True if the index changed.
+        ident = (item['media_type'], item['id'])
+        old = self._items.get(ident)
+        if old is not None:
+            self._items.move_to_end(ident)
+            # Keep fields this response lacked (search results vs details)
+            item = {**old, **item}
+            if old == item:
+                return False
+            self._drop_keys(old)
+        self._items[ident] = item
+        for entry in self._title_keys(item):
+            bisect.insort(self._keys, entry)
+
+        while len(self._items) > self.max_titles:
+            _, old_item = self._items.popitem(last=False)
+            self._drop_keys(old_item)
+        return True
+
+    def add_results(self, endpoint, data):
+        """Index the titles in a TMDB response: its results list, an embedded
+        recommendations list, or a single movie/show (details endpoints)."""
+        if not isinstance(data, dict):
+            return
+        items = list(data.get('results') or [])
+        items += (data.get('recommendations') or {}).get('results') or []
+        if DETAILS_ENDPOINT_RE.match(endpoint):
+            items.append(data)
+
+        kept = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get('poster_path') or 'id' not in item:
+                continue
+            media_type = media_type_for(endpoint, item)
+            if media_type is None:
+                continue
+            compact = {k: item[k] for k in KEPT_FIELDS if item.get(k) is not None}
+            compact['media_type'] = media_type
+            kept.append(compact)
+        if not kept:
+            return
+
+        with self._lock:
+            self._ensure_loaded()
+            changed = sum(self._put(item) for item in kept)
+            self.added += changed
+            if changed:
+                self._dirty = True
+            save_now = self._dirty and self._schedule_save()
+        if save_now:
+            if self.background is not None:
+                self.background(self.save)
+            else:
+                self.save()
+
+    # --- lookups ---
+
+    def search(self, query, limit=10, scan=2000):
+        """Titles with a word starting with query, leading-title matches
+        first, then by TMDB popularity. At most scan keys are examined."""
+        prefix = normalize_title(query)
+        if not prefix:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            self.lookups += 1
+            matches = {}
+            i = bisect.bisect_left(self._keys, (prefix,))
+            end = min(len(self._keys), i + scan)
+            while i < end and self._keys[i][0].startswith(prefix):
+                _, media_type, tmdb_id, pos = self._keys[i]
+                ident = (media_type, tmdb_id)
+                if ident not in matches or pos == 0:
+                    matches[ident] = (self._items[ident], pos == 0)
+                i += 1
+
+        ranked = sorted(
+            matches.values(),
+            key=lambda m: (not m[1], -(m[0].get('popularity') or 0)),
+        )
+        return [dict(item) for item, _ in ranked[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'titles': len(self._items),
+                'keys': len(self._keys),
+                'max_titles': self.max_titles,
+                'lookups': self.lookups,
+                'added': self.added,
+                'loaded': self._loaded,
+            }
@@ -0,0 +1,463 @@
+"""
+ytdlp_pool.py
+
+Runs yt-dlp extraction in a pool of long-lived worker processes. yt-dlp is
+CPU-heavy pure Python and holds the GIL, so running it on a waitress thread
+slows every other route down. Each worker keeps warm YoutubeDL instances
+(one per option profile) across jobs. Waiting for a free worker and running
+the job are bounded separately (queue_timeout, job_timeout); a worker that
+times out or dies is killed and replaced, and workers are recycled after a
+fixed number of jobs to cap memory growth.
+
+This module is imported by the worker processes too, so it must not import
+anything from the Flask app.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+
+from .http_client import _env_number
+
+
+# yt-dlp option profiles. Workers build one YoutubeDL per profile on demand
+# and reuse it for every later job.
+YDL_PROFILES = {
+    # Fully-resolved search (formats and signatures for every result)
+    'search_full': {
+        'format': 'bestaudio/best',
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'ignoreerrors': True,  # Continue on errors
+        'age_limit': None,
+        'geo_bypass': True,
+        # These options help with signature extraction issues
+        'extractor_retries': 3,
+        'fragment_retries': 10,
+        'skip_unavailable_fragments': True,
+    },
+    # Metadata only: one search page request, nothing per video
+    'search_fast': {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'ignoreerrors': True,
+        'geo_bypass': True,
+        'extractor_retries': 3,
+    },
+    'stream': {
+        'format': 'bestaudio/best', # Select best audio
+        'quiet': True,
+        'no_warnings': True,
+        'ignoreerrors': True,
+        'extractor_retries': 3,
+        'fragment_retries': 10,
+        'skip_unavailable_fragments': True,
+    },
+}
+
+# Entry fields worth sending back to the app process
+SEARCH_ENTRY_FIELDS = ('id', 'url', 'webpage_url', 'title', 'uploader', 'channel', 'thumbnail', 'duration')
+
+
+class ExtractionError(Exception):
+    """The extraction job failed inside the worker."""
+
+
+class ExtractionTimeout(ExtractionError):
+    """No worker became free, or the job overran its timeout."""
+
+
+# --- Jobs (run inside a worker, or in-process when the pool is disabled) ---
+
+def _ydl(instances, profile):
+    ydl = instances.get(profile)
+    if ydl is None:
+        import yt_dlp
+        ydl = instances[profile] = yt_dlp.YoutubeDL(YDL_PROFILES[profile])
+    return ydl
+
+
+def job_search(instances, query, mode='fast'):
+    """Return trimmed entries for a YouTube search."""
+    ydl = _ydl(instances, 'search_full' if mode == 'full' else 'search_fast')
+    # Search for 10 videos to ensure we get good results even if some fail
+    search_data = ydl.extract_info(f"ytsearch10:{query} official audio", download=False)
+    if not search_data:
+        raise Exception("yt-dlp search returned nothing")
+
+    entries = []
+    for video in search_data.get('entries') or []:
+        # Skip videos that failed to extract
+        if not video:
+            continue
+        entry = {k: video.get(k) for k in SEARCH_ENTRY_FIELDS if video.get(k) is not None}
+        if video.get('thumbnails'):
+            # Flat entries carry a list of thumbnails, largest last
+            entry['thumbnails'] = video['thumbnails'][-1:]
+        entries.append(entry)
+    return entries
+
+
+def job_resolve(instances, track_id):
+    """Return the direct stream URL plus duration/thumbnail for a track."""
+    info = _ydl(instances, 'stream').extract_info(track_id, download=False)
+    if not info or 'url' not in info:
+        raise Exception("Could not extract stream URL")
+    return {
+        'url': info['url'], # This is the direct stream URL
+        'duration': info.get('duration'),
+        'thumbnail': info.get('thumbnail'),
+    }
+
+
+def job_search_iter(instances, query, mode='fast', limit=5):
+    """Yield trimmed search entries one at a time as yt-dlp produces them,
+    stopping once limit entries have been yielded."""
+    ydl = _ydl(instances, 'search_full' if mode == 'full' else 'search_fast')
+    # process=False leaves 'entries' as a lazy generator, so each result can
+    # be sent on as soon as it's extracted and the rest never gets fetched
+    search_data = ydl.extract_info(f"ytsearch10:{query} official audio", download=False, process=False)
+    if not search_data:
+        raise Exception("yt-dlp search returned nothing")
+
+    count = 0
+    for video in search_data.get('entries') or []:
+        if mode == 'full':
+            video = ydl.process_ie_result(video, download=False)
+        # Skip videos that failed to extract
+        if not video or not video.get('title'):
+            continue
+        entry = {k: video.get(k) for k in SEARCH_ENTRY_FIELDS if video.get(k) is not None}
+        if video.get('thumbnails'):
+            entry['thumbnails'] = video['thumbnails'][-1:]
+        yield entry
+        count += 1
+        if count >= limit:
+            break
+
+
+JOBS = {
+    'search': job_search,
+    'search_iter': job_search_iter,
+    'resolve': job_resolve,
+}
+
+# Jobs that yield results incrementally; use ExtractorPool.iter() for these
+STREAMING_JOBS = {'search_iter'}
+
+
+def _worker_main(conn, warm_profiles):
+    instances = {}
+    try:
+        for profile in warm_profiles:
+            _ydl(instances, profile)
+    except Exception as e:
+        print(f"yt-dlp worker warm-up failed: {e}")
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        # Replies are (status, payload): 'ok' with the result, 'error' with
+        # a message, or for streaming jobs any number of 'item's then 'end'
+        kind, args = message
+        try:
+            result = JOBS[kind](instances, *args)
+            if kind in STREAMING_JOBS:
+                for item in result:
+                    conn.send(('item', item))
+                conn.send(('end', None))
+            else:
+                conn.send(('ok', result))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+# --- Pool (app process side) ---
+
+class _Worker:
+    def __init__(self, ctx, warm_profiles):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, warm_profiles),
+            name='heimdall-ytdlp',
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.process.join(timeout=1 if not kill else None)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class ExtractorPool:
+    def __init__(self, workers=2, job_timeout=45, queue_timeout=30,
+                 max_jobs_per_worker=200, warm_profiles=('search_fast', 'stream')):
+        self.size = workers
+        self.job_timeout = job_timeout
+        # How long a job may wait for a free worker; the job's own timeout
+        # only starts once it has one
+        self.queue_timeout = queue_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.warm_profiles = tuple(warm_profiles)
+        # spawn works the same on Windows, macOS and Linux and doesn't fork
+        # a copy of the threaded server
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        # Used when the pool is disabled (workers=0): jobs run in-process
+        self._local = threading.local()
+        self.waiting = 0
+        self.busy = 0
+        self.jobs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.queue_timeouts = 0
+        self.crashes = 0
+        self.recycled = 0
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def start(self):
+        """Spawn the workers (idempotent). Called lazily by run()."""
+        if self._started or not self.enabled:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawn_async()
+
+    def _spawn_async(self):
+        # Spawning imports yt-dlp in the child; don't make a caller wait on it
+        def _spawn():
+            try:
+                self._idle.put(_Worker(self._ctx, self.warm_profiles))
+            except Exception as e:
+                print(f"Failed to start yt-dlp worker: {e}")
+        threading.Thread(target=_spawn, name='heimdall-ytdlp-spawn', daemon=True).start()
+
+    def _replace(self, worker, kill):
+        threading.Thread(target=worker.stop, kwargs={'kill': kill}, daemon=True).start()
+        self._spawn_async()
+
+    def run(self, kind, *args, timeout=None):
+        """Run a job on a free worker and return its result. Raises
+        ExtractionError on failure and ExtractionTimeout if no worker frees
+        up within the pool's queue_timeout or the job overruns timeout
+        (default: the pool's job_timeout), counted from when it got a worker."""
+        if kind not in JOBS or kind in STREAMING_JOBS:
+            raise ValueError(f"Unknown extraction job {kind}")
+        if timeout is None:
+            timeout = self.job_timeout
+
+        if not self.enabled:
+            return self._run_local(kind, args)
+
+        worker, deadline = self._acquire(timeout)
+        try:
+            self._send(worker, kind, args)
+            status, payload = self._recv(worker, kind, deadline, timeout)
+        finally:
+            with self._lock:
+                self.busy -= 1
+
+        self._release(worker, ok=(status == 'ok'))
+        if status != 'ok':
+            raise ExtractionError(payload)
+        return payload
+
+    def iter(self, kind, *args, timeout=None):
+        """Run a streaming job, yielding each result as the worker sends it.
+        timeout bounds the whole job once it has a worker. Closing the generator early is fine:
+        the worker's remaining output is drained in the background."""
+        if kind not in STREAMING_JOBS:
+            raise ValueError(f"Unknown streaming extraction job {kind}")
+        if timeout is None:
+            timeout = self.job_timeout
+
+        if not self.enabled:
+            yield from self._iter_local(kind, args)
+            return
+
+        worker, deadline = self._acquire(timeout)
+        finished = False
+        try:
+            self._send(worker, kind, args)
+            while True:
+                status, payload = self._recv(worker, kind, deadline, timeout)
+                if status == 'item':
+                    yield payload
+                    continue
+                finished = True
+                self._release(worker, ok=(status == 'end'))
+                if status == 'error':
+                    raise ExtractionError(payload)
+                return
+        except ExtractionError:
+            # _recv already replaced the worker (or it was released above)
+            finished = True
+            raise
+        finally:
+            with self._lock:
+                self.busy -= 1
+            if not finished:
+                threading.Thread(
+                    target=self._drain, args=(worker, kind, deadline, timeout),
+                    name='heimdall-ytdlp-drain', daemon=True,
+                ).start()
+
+    def _acquire(self, timeout):
+        """Wait up to queue_timeout for an idle worker. Returns (worker, job
+        deadline), the deadline counted from now so queueing doesn't eat into
+        the job's own timeout."""
+        self.start()
+        with self._lock:
+            self.waiting += 1
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            with self._lock:
+                self.queue_timeouts += 1
+            raise ExtractionTimeout(f"No yt-dlp worker available after {self.queue_timeout}s")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.busy += 1
+        return worker, time.monotonic() + timeout
+
+    def _send(self, worker, kind, args):
+        try:
+            worker.conn.send((kind, args))
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self.crashes += 1
+            self._replace(worker, kill=True)
+            raise ExtractionError(f"yt-dlp worker died: {e}")
+
+    def _recv(self, worker, kind, deadline, timeout):
+        """Next (status, payload) from the worker. A worker that overruns the
+        deadline or dies is replaced and an ExtractionError raised."""
+        try:
+            if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                with self._lock:
+                    self.timeouts += 1
+                self._replace(worker, kill=True)
+                raise ExtractionTimeout(f"yt-dlp {kind} job timed out after {timeout}s")
+            return worker.conn.recv()
+        except (EOFError, OSError) as e:
+            with self._lock:
+                self.crashes += 1
+            self._replace(worker, kill=True)
+            raise ExtractionError(f"yt-dlp worker died: {e}")
+
+    def _release(self, worker, ok):
+        """Book-keep a finished job and return the worker to the idle queue,
+        or recycle it if it has done enough jobs."""
+        worker.jobs += 1
+        with self._lock:
+            self.jobs += 1
+            if not ok:
+                self.failures += 1
+        if worker.jobs >= self.max_jobs_per_worker:
+            with self._lock:
+                self.recycled += 1
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+    def _drain(self, worker, kind, deadline, timeout):
+        # Discard the rest of an abandoned streaming job so the worker can be
+        # reused; _recv replaces it if it doesn't finish in time
+        try:
+            while True:
+                status, _ = self._recv(worker, kind, deadline, timeout)
+                if status != 'item':
+                    self._release(worker, ok=(status == 'end'))
+                    return
+        except ExtractionError:
+            pass
+
+    def _run_local(self, kind, args):
+        # YoutubeDL instances aren't thread-safe, so each thread keeps its own
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        with self._lock:
+            self.jobs += 1
+        try:
+            return JOBS[kind](instances, *args)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            raise ExtractionError(f"{type(e).__name__}: {e}")
+
+    def _iter_local(self, kind, args):
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        with self._lock:
+            self.jobs += 1
+        try:
+            yield from JOBS[kind](instances, *args)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            raise ExtractionError(f"{type(e).__name__}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.size,
+                'idle': self._idle.qsize(),
+                'busy': self.busy,
+                'queue_depth': self.waiting,
+                'jobs': self.jobs,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'queue_timeouts': self.queue_timeouts,
+                'crashes': self.crashes,
+                'recycled': self.recycled,
+            }
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+# HEIMDALL_YTDLP_WORKERS=0 runs extraction in-process instead
+extractor_pool = ExtractorPool(
+    workers=_env_number('HEIMDALL_YTDLP_WORKERS', 2, int),
+    job_timeout=_env_number('HEIMDALL_YTDLP_JOB_TIMEOUT', 45),
+    queue_timeout=_env_number('HEIMDALL_YTDLP_QUEUE_TIMEOUT', 30),
+    max_jobs_per_worker=_env_number('HEIMDALL_YTDLP_MAX_JOBS', 200, int),
+)
@@ -0,0 +1,94 @@
+"""
+bench_user_lookup.py
+
+Measures login-path user lookup latency as users.csv grows, to check that
+User.get_user / User.validate_login stay flat from 10 to 1M users.
+
+Usage:
+    python benchmarks/bench_user_lookup.py [sizes...]
+
+Each size gets a fresh temporary data dir. Every generated user shares one
+precomputed low-cost bcrypt hash so building a 1M-row file is quick; the
+bcrypt cost itself doesn't depend on the number of users.
+"""
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import bcrypt
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+LOOKUPS = 2_000
+PASSWORD = 'benchmark-password'
+
+# Match the generated hashes so validate_login doesn't rehash every user
+os.environ.setdefault('HEIMDALL_BCRYPT_ROUNDS', '4')
+
+
+def build_users_file(path, count, hashed):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['username', 'password'])
+        for i in range(count):
+            writer.writerow([f'user{i}', hashed])
+
+
+def time_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench(count, hashed):
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ['HEIMDALL_DATA_DIR'] = data_dir
+        build_users_file(os.path.join(data_dir, 'users.csv'), count, hashed)
+
+        from backend.models.user import User
+        model = User()
+
+        # The first lookup builds the index; report it separately
+        start = time.perf_counter()
+        model.get_user('user0')
+        first = time.perf_counter() - start
+
+        names = [(f'user{random.randrange(count)}',) for _ in range(LOOKUPS)]
+        names += [(f'missing{i}',) for i in range(LOOKUPS // 10)]
+        lookups = time_calls(model.get_user, names)
+
+        logins = time_calls(model.validate_login, [(f'user{random.randrange(count)}', PASSWORD) for _ in range(20)])
+
+    return {
+        'users': count,
+        'index_build_ms': first * 1000,
+        'lookup_p50_us': statistics.median(lookups) * 1e6,
+        'lookup_p99_us': sorted(lookups)[int(len(lookups) * 0.99)] * 1e6,
+        'login_p50_ms': statistics.median(logins) * 1000,
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    # Minimum bcrypt cost keeps the login column about lookups, not hashing
+    hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+    print(f"{'users':>10} {'index build ms':>15} {'lookup p50 us':>14} {'lookup p99 us':>14} {'login p50 ms':>13}")
+    for count in sizes:
+        r = bench(count, hashed)
+        print(f"{r['users']:>10} {r['index_build_ms']:>15.1f} {r['lookup_p50_us']:>14.1f} "
+              f"{r['lookup_p99_us']:>14.1f} {r['login_p50_ms']:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -55,6 +55,17 @@ pyinstaller_args = [
     '--hidden-import=itsdangerous',
     '--hidden-import=markupsafe',
     '--hidden-import=bcrypt',
+
+    # ASGI stack (uvicorn loads its protocol/loop modules by name)
+    '--hidden-import=backend.asgi',
+    '--hidden-import=aiohttp',
+    '--hidden-import=a2wsgi',
+    '--hidden-import=uvicorn',
+    '--hidden-import=uvicorn.logging',
+    '--hidden-import=uvicorn.loops.auto',
+    '--hidden-import=uvicorn.protocols.http.auto',
+    '--hidden-import=uvicorn.protocols.websockets.auto',
+    '--hidden-import=uvicorn.lifespan.on',
     
     # Exclude unnecessary packages to reduce size
     '--exclude-module=tkinter',
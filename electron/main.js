@@ -14,10 +14,11 @@ const isDev = !app.isPackaged;
 function getFlaskExecutablePath() {
     if (isDev) {
         // Development: Use Python directly
-        // Run the backend as a module so package-relative imports work
+        // Run the backend package's entry point (backend/__main__.py) so
+        // package-relative imports work and the app module is loaded once
         return {
             command: 'python',
-            args: ['-m', 'backend.app'],
+            args: ['-m', 'backend'],
             cwd: path.join(__dirname, '..')
         };
     } else {
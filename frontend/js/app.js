@@ -53,7 +53,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // We now accept 'mediaType' to build the correct link
     const createMediaCard = (item, mediaType) => {
         if (!item.poster_path) return ''; 
-        const posterUrl = `https://image.tmdb.org/t/p/w500${item.poster_path}`;
+        const posterUrl = `/img/w500${item.poster_path}`;
         const detailsUrl = `/details/${mediaType}/${item.id}`;
         const title = item.title || item.name; 
 
@@ -69,7 +69,7 @@ document.addEventListener('DOMContentLoaded', () => {
         if (!mediaType || !item.poster_path) return '';
 
         // Use a smaller poster size (w92 is perfect for lists)
-        const posterUrl = `https://image.tmdb.org/t/p/w92${item.poster_path}`;
+        const posterUrl = `/img/w92${item.poster_path}`;
         const detailsUrl = `/details/${mediaType}/${item.id}`;
         const title = item.title || item.name;
         
@@ -91,6 +91,21 @@ document.addEventListener('DOMContentLoaded', () => {
         `;
     };
 
+    // Fill a carousel container with cards; returns the first item for the hero section
+    const renderCarousel = (container, items, mediaType) => {
+        container.innerHTML = '';
+
+        if (Array.isArray(items) && items.length > 0) {
+            items.forEach(item => {
+                container.innerHTML += createMediaCard(item, mediaType);
+            });
+            return items[0];
+        }
+
+        container.innerHTML = '<p class="text-gray-400">No titles found.</p>';
+        return null;
+    };
+
     // --- UPDATED: Function to fetch data and build a carousel ---
     // We now pass 'mediaType' to the card builder
     const fetchAndBuildCarousel = async (apiEndpoint, containerId, mediaType) => {
@@ -110,19 +125,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const items = await response.json();
 
-            container.innerHTML = '';
-            
-            // Populate carousel
-            if (Array.isArray(items) && items.length > 0) {
-                items.forEach(item => {
-                    container.innerHTML += createMediaCard(item, mediaType);
-                });
-            } else {
-                container.innerHTML = '<p class="text-gray-400">No titles found.</p>';
-            }
-            
-            // Return first item for the hero section
-            return Array.isArray(items) && items.length > 0 ? items[0] : null; 
+            return renderCarousel(container, items, mediaType);
 
         } catch (error) {
             console.error(`Error fetching ${apiEndpoint}:`, error);
@@ -141,7 +144,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const playLink = document.getElementById('hero-play-link');
         const infoLink = document.getElementById('hero-info-link');
 
-        const backdropUrl = `https://image.tmdb.org/t/p/original${item.backdrop_path}`;
+        const backdropUrl = `/img/w1280${item.backdrop_path}`;
         const title = item.title || item.name; // Use title or name
 
         bgImage.src = backdropUrl;
@@ -160,27 +163,59 @@ document.addEventListener('DOMContentLoaded', () => {
         infoLink.href = `/details/${mediaType}/${item.id}`;
     };
 
+    // Home page rows: /api/home row name, per-row fallback endpoint, media type.
+    // Carousel container ids are `carousel-${row}`.
+    const HOME_ROWS = [
+        { row: 'trending-movies', endpoint: '/api/movies/trending', mediaType: 'movie' },
+        { row: 'top-rated-movies', endpoint: '/api/movies/top-rated', mediaType: 'movie' },
+        { row: 'popular-movies', endpoint: '/api/movies/popular', mediaType: 'movie' },
+        { row: 'trending-tv', endpoint: '/api/tv/trending', mediaType: 'tv' },
+        { row: 'top-rated-tv', endpoint: '/api/tv/top-rated', mediaType: 'tv' },
+        { row: 'popular-tv', endpoint: '/api/tv/popular', mediaType: 'tv' },
+    ];
+
     // --- UPDATED: Load all content when the page is ready ---
+    // All rows arrive in a single /api/home request; any row the server
+    // couldn't deliver in time falls back to its own endpoint.
     const loadBrowseContent = async () => {
-        // Fetch trending movies and use the first one for the hero
-        const firstTrendingMovie = await fetchAndBuildCarousel(
-            '/api/movies/trending', 
-            'carousel-trending-movies', // Updated ID
-            'movie' // mediaType
-        );
-        
-        if (firstTrendingMovie) {
-            updateHero(firstTrendingMovie, 'movie'); // Pass mediaType
+        HOME_ROWS.forEach(({ row }) => {
+            const container = document.getElementById(`carousel-${row}`);
+            if (container) {
+                container.innerHTML = '<div class="w-full flex justify-center items-center py-12"><div class="spinner"></div></div>';
+            }
+        });
+
+        let home = null;
+        try {
+            const response = await fetch('/api/home');
+            if (response.status === 401) {
+                window.location.href = '/login.html';
+                return;
+            }
+            if (response.ok) {
+                home = await response.json();
+            }
+        } catch (error) {
+            console.error('Error fetching /api/home:', error);
         }
 
-        // Fetch other movie carousels
-        fetchAndBuildCarousel('/api/movies/top-rated', 'carousel-top-rated-movies', 'movie');
-        fetchAndBuildCarousel('/api/movies/popular', 'carousel-popular-movies', 'movie');
+        HOME_ROWS.forEach(async ({ row, endpoint, mediaType }) => {
+            const containerId = `carousel-${row}`;
+            const container = document.getElementById(containerId);
+            if (!container) return;
 
-        // --- NEW: Fetch TV carousels ---
-        fetchAndBuildCarousel('/api/tv/trending', 'carousel-trending-tv', 'tv');
-        fetchAndBuildCarousel('/api/tv/top-rated', 'carousel-top-rated-tv', 'tv');
-        fetchAndBuildCarousel('/api/tv/popular', 'carousel-popular-tv', 'tv');
+            let firstItem;
+            if (home && home.rows && home.rows[row]) {
+                firstItem = renderCarousel(container, home.rows[row], mediaType);
+            } else {
+                firstItem = await fetchAndBuildCarousel(endpoint, containerId, mediaType);
+            }
+
+            // The first trending movie is used for the hero
+            if (row === 'trending-movies' && firstItem) {
+                updateHero(firstItem, 'movie');
+            }
+        });
     };
 
     // Run the function to load all content (only on index page)
@@ -196,8 +231,42 @@ document.addEventListener('DOMContentLoaded', () => {
     const searchResultsList = document.getElementById('search-results-list'); 
     const searchResultsHeading = document.getElementById('search-results-heading'); // May not exist on all pages
 
+    // Each keystroke gets a sequence number so slower, older responses
+    // never overwrite the results for what is typed now
+    let searchSeq = 0;
+    let fullResultsSeq = 0;
+
+    const renderSearchResults = (results) => {
+        if (!searchResultsList) return;
+        searchResultsList.innerHTML = ''; // Clear previous results
+        if (searchResultsHeading) searchResultsHeading.classList.remove('hidden');
+        if (Array.isArray(results) && results.length > 0) {
+            results.forEach(item => {
+                // MODIFIED: Use the new dropdown item function
+                searchResultsList.innerHTML += createSearchDropdownItem(item); 
+            });
+        } else {
+            searchResultsList.innerHTML = '<p class="text-gray-400 col-span-full text-center">No results found.</p>'; // MODIFIED
+        }
+    };
+
+    // Instant suggestions from titles the backend has already seen; shown
+    // until the full search below comes back
+    const showSuggestions = async (query, seq) => {
+        try {
+            const response = await fetch(`/api/search/suggest?q=${encodeURIComponent(query)}`);
+            if (!response.ok) return;
+            const results = await response.json();
+            if (seq === searchSeq && fullResultsSeq !== seq && results.length > 0) {
+                renderSearchResults(results);
+            }
+        } catch (error) {
+            // The full search reports errors
+        }
+    };
+
     // Function to perform the actual search
-    const performSearch = async (query) => {
+    const performSearch = async (query, seq) => {
         // Clear list and hide heading if query is too short
         if (query.length < 2) {
             if (searchResultsList) searchResultsList.innerHTML = '';
@@ -206,29 +275,19 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         try {
-            // Call our new backend search API
+            // Call our new backend search API (suggestions first, then TMDB matches)
             const response = await fetch(`/api/search?q=${encodeURIComponent(query)}`);
             if (!response.ok) {
                 if (response.status === 401) window.location.href = '/login.html';
                 throw new Error('Search failed');
             }
             const results = await response.json();
-            
-            if (searchResultsList) {
-                searchResultsList.innerHTML = ''; // Clear previous results
-                if (Array.isArray(results) && results.length > 0) {
-                    if (searchResultsHeading) searchResultsHeading.classList.remove('hidden');
-                    results.forEach(item => {
-                        // MODIFIED: Use the new dropdown item function
-                        searchResultsList.innerHTML += createSearchDropdownItem(item); 
-                    });
-                } else {
-                    if (searchResultsHeading) searchResultsHeading.classList.remove('hidden');
-                    searchResultsList.innerHTML = '<p class="text-gray-400 col-span-full text-center">No results found.</p>'; // MODIFIED
-                }
-            }
+            if (seq !== searchSeq) return;
+            fullResultsSeq = seq;
+            renderSearchResults(results);
 
         } catch (error) {
+            if (seq !== searchSeq) return;
             console.error('Error performing search:', error);
             if (searchResultsHeading) searchResultsHeading.classList.remove('hidden');
             if (searchResultsList) searchResultsList.innerHTML = '<p class="text-gray-400 col-span-full text-center">Error loading results.</p>'; // MODIFIED
@@ -249,6 +308,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if (searchCloseBtn && searchOverlay) {
         searchCloseBtn.addEventListener('click', () => {
             searchOverlay.classList.add('hidden');
+            searchSeq++; // Drop any response still in flight
             if (searchInput) searchInput.value = ''; // Clear input on close
             if (searchResultsList) searchResultsList.innerHTML = ''; // Clear results on close
             if (searchResultsHeading) searchResultsHeading.classList.add('hidden');
@@ -258,7 +318,10 @@ document.addEventListener('DOMContentLoaded', () => {
     if (searchInput) {
         // Listen for the 'input' event and call the debounced search
         searchInput.addEventListener('input', (e) => {
-            debouncedSearch(e.target.value);
+            const query = e.target.value;
+            const seq = ++searchSeq;
+            if (query.length >= 2) showSuggestions(query, seq);
+            debouncedSearch(query, seq);
         });
     }
 
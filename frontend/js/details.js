@@ -131,7 +131,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         return `
             <a href="${detailsUrl}" class="flex-shrink-0 w-poster-w h-poster-h rounded-lg shadow-lg transform hover:scale-105 hover:z-10 transition-transform duration-300 cursor-pointer">
-                <img src="https://image.tmdb.org/t/p/w500${item.poster_path}" alt="${title}" class="w-full h-full object-cover rounded-lg">
+                <img src="/img/w500${item.poster_path}" alt="${title}" class="w-full h-full object-cover rounded-lg">
             </a>
         `;
     };
@@ -145,7 +145,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const createEpisodeListItem = (episode, tvId) => {
         const stillUrl = episode.still_path 
-            ? `https://image.tmdb.org/t/p/w300${episode.still_path}`
+            ? `/img/w300${episode.still_path}`
             : 'https://placehold.co/180x100/1a1d23/e50914?text=Heimdall'; // Placeholder
 
         // Redirect directly to Vidrock for TV episodes
@@ -229,8 +229,8 @@ document.addEventListener('DOMContentLoaded', () => {
             currentItem = details;
 
             // --- (Populate Hero, Meta, Genres, Play Button... all unchanged) ---
-            document.getElementById('details-backdrop').src = `https://image.tmdb.org/t/p/original${details.backdrop_path}`;
-            document.getElementById('details-poster').src = `https://image.tmdb.org/t/p/w500${details.poster_path}`;
+            document.getElementById('details-backdrop').src = `/img/w1280${details.backdrop_path}`;
+            document.getElementById('details-poster').src = `/img/w500${details.poster_path}`;
             document.getElementById('details-title').textContent = details.title || details.name;
             document.getElementById('details-overview').textContent = details.overview;
             
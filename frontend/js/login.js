@@ -38,6 +38,8 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.ok) {
                 localStorage.setItem('isLoggedIn', 'true');
                 window.location.href = '/profiles.html';
+            } else if (response.status === 503) {
+                showError('Server is busy, please try again in a moment');
             } else {
                 showError('Invalid username or password');
             }
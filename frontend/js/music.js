@@ -80,6 +80,11 @@ document.addEventListener('DOMContentLoaded', () => {
     let selectedPlaylistId = null;
     let trackToAdd = null;
     let playlistToDelete = null; 
+    // Stream URLs resolved ahead of time for upcoming queue entries (id -> stream)
+    const prefetchedStreams = new Map();
+    const PREFETCH_COUNT = 3;
+    // AbortController for the music search currently streaming in
+    let activeSearch = null;
     const loadQueue = () => {
         try {
             const saved = localStorage.getItem('heimdall-music-queue');
@@ -422,7 +427,66 @@ document.addEventListener('DOMContentLoaded', () => {
         return { artist, title };
     };
 
-    // Search music (No changes)
+    // Build a search result card and append it to the results list
+    function renderTrackCard(track) {
+        const trackCard = document.createElement('div');
+        trackCard.className = 'flex items-center p-4 bg-brand-gray rounded-xl hover:bg-brand-light-gray transition-all duration-200 group';
+        
+        const duration = track.duration ? formatDuration(track.duration) : '';
+        
+        trackCard.innerHTML = `
+            <img src="${track.image || 'https://placehold.co/80x80/1a1d23/666?text=No+Image'}" 
+                 alt="${track.title}" 
+                 class="w-20 h-20 rounded-lg object-cover shadow-md mr-4 flex-shrink-0">
+            <div class="flex-1 min-w-0 mr-4">
+                <h3 class="font-bold text-lg truncate group-hover:text-brand-red transition-colors duration-200">
+                    ${track.title}
+                </h3>
+                <p class="text-sm text-gray-400 truncate">${track.artist}</p>
+                ${duration ? `<p class="text-xs text-gray-500 mt-1">${duration}</p>` : ''}
+            </div>
+            <div class="flex items-center space-x-2">
+                <button class="play-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Play now">
+                    <svg xmlns="http://www.w3.org/2000/svg" class="h-8 w-8 text-gray-500 group-hover:text-brand-red transition-colors duration-200" fill="currentColor" viewBox="0 0 20 20">
+                        <path d="M10 18a8 8 0 100-16 8 8 0 000 16zM9.555 7.168A1 1 0 008 8v4a1 1 0 001.555.832l3-2a1 1 0 000-1.664l-3-2z" />
+                    </svg>
+                </button>
+                <button class="add-queue-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Add to queue">
+                    <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 text-gray-500 hover:text-brand-red transition-colors" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
+                        <path stroke-linecap="round" stroke-linejoin="round" d="M12 4v16m8-8H4" />
+                    </svg>
+                </button>
+                <button class="add-to-playlist-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Add to playlist">
+                    <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 text-gray-500 hover:text-brand-red transition-colors" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
+                        <path stroke-linecap="round" stroke-linejoin="round" d="M19 11H5m14 0a2 2 0 012 2v6a2 2 0 01-2 2H5a2 2 0 01-2-2v-6a2 2 0 012-2m14 0V9a2 2 0 00-2-2M5 11V9a2 2 0 012-2m0 0V5a2 2 0 012-2h6a2 2 0 012 2v2M7 7h10" />
+                    </svg>
+                </button>
+            </div>
+        `;
+        
+        const playBtn = trackCard.querySelector('.play-btn');
+        const addQueueBtn = trackCard.querySelector('.add-queue-btn');
+        const addToPlaylistBtn = trackCard.querySelector('.add-to-playlist-btn');
+
+        playBtn.addEventListener('click', (e) => {
+            e.stopPropagation();
+            playTrack(track, false);
+        });
+
+        addQueueBtn.addEventListener('click', (e) => {
+            e.stopPropagation();
+            addToQueue(track);
+        });
+
+        addToPlaylistBtn.addEventListener('click', (e) => {
+            e.stopPropagation();
+            openAddToPlaylistModal(track);
+        });
+
+        resultsList.appendChild(trackCard);
+    }
+
+    // Search music, streaming results in as they are found
     async function searchMusic(query) {
         if (!query || query.trim().length < 2) {
             resultsSection.classList.add('hidden');
@@ -438,84 +502,62 @@ document.addEventListener('DOMContentLoaded', () => {
             </div>
         `;
 
-        try {
-            const response = await fetch(`${window.location.origin}/api/music/search/${encodeURIComponent(query)}`);
-            const results = await response.json();
+        // A newer search supersedes this one; stop reading its stream
+        if (activeSearch) activeSearch.abort();
+        const controller = new AbortController();
+        activeSearch = controller;
 
-            resultsList.innerHTML = '';
+        const showNoResults = () => {
+            resultsList.innerHTML = `
+                <div class="text-center py-12">
+                    <svg xmlns="http://www.w3.org/2000/svg" class="h-16 w-16 text-gray-600 mx-auto mb-4" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="1.5">
+                        <path stroke-linecap="round" stroke-linejoin="round" d="M9.172 16.172a4 4 0 015.656 0M9 10h.01M15 10h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z" />
+                    </svg>
+                    <p class="text-gray-400 text-lg">No results found for "${query}"</p>
+                    <p class="text-gray-500 text-sm mt-2">Try a different search term</p>
+                </div>
+            `;
+        };
 
-            if (results.length === 0) {
-                resultsList.innerHTML = `
-                    <div class="text-center py-12">
-                        <svg xmlns="http://www.w3.org/2000/svg" class="h-16 w-16 text-gray-600 mx-auto mb-4" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="1.5">
-                            <path stroke-linecap="round" stroke-linejoin="round" d="M9.172 16.172a4 4 0 015.656 0M9 10h.01M15 10h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z" />
-                        </svg>
-                        <p class="text-gray-400 text-lg">No results found for "${query}"</p>
-                        <p class="text-gray-500 text-sm mt-2">Try a different search term</p>
-                    </div>
-                `;
-                return;
+        try {
+            // Results arrive as NDJSON, one track per line, and are rendered
+            // as soon as each line comes in
+            const response = await fetch(
+                `${window.location.origin}/api/music/search/${encodeURIComponent(query)}/stream`,
+                { signal: controller.signal }
+            );
+            if (!response.ok || !response.body) {
+                throw new Error(`Search failed (${response.status})`);
             }
 
-            results.forEach(track => {
-                const trackCard = document.createElement('div');
-                trackCard.className = 'flex items-center p-4 bg-brand-gray rounded-xl hover:bg-brand-light-gray transition-all duration-200 group';
-                
-                const duration = track.duration ? formatDuration(track.duration) : '';
-                
-                trackCard.innerHTML = `
-                    <img src="${track.image || 'https://placehold.co/80x80/1a1d23/666?text=No+Image'}" 
-                         alt="${track.title}" 
-                         class="w-20 h-20 rounded-lg object-cover shadow-md mr-4 flex-shrink-0">
-                    <div class="flex-1 min-w-0 mr-4">
-                        <h3 class="font-bold text-lg truncate group-hover:text-brand-red transition-colors duration-200">
-                            ${track.title}
-                        </h3>
-                        <p class="text-sm text-gray-400 truncate">${track.artist}</p>
-                        ${duration ? `<p class="text-xs text-gray-500 mt-1">${duration}</p>` : ''}
-                    </div>
-                    <div class="flex items-center space-x-2">
-                        <button class="play-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Play now">
-                            <svg xmlns="http://www.w3.org/2000/svg" class="h-8 w-8 text-gray-500 group-hover:text-brand-red transition-colors duration-200" fill="currentColor" viewBox="0 0 20 20">
-                                <path d="M10 18a8 8 0 100-16 8 8 0 000 16zM9.555 7.168A1 1 0 008 8v4a1 1 0 001.555.832l3-2a1 1 0 000-1.664l-3-2z" />
-                            </svg>
-                        </button>
-                        <button class="add-queue-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Add to queue">
-                            <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 text-gray-500 hover:text-brand-red transition-colors" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
-                                <path stroke-linecap="round" stroke-linejoin="round" d="M12 4v16m8-8H4" />
-                            </svg>
-                        </button>
-                        <button class="add-to-playlist-btn p-2 hover:bg-brand-light-gray rounded-lg transition-colors" title="Add to playlist">
-                            <svg xmlns="http://www.w3.org/2000/svg" class="h-6 w-6 text-gray-500 hover:text-brand-red transition-colors" fill="none" viewBox="0 0 24 24" stroke="currentColor" stroke-width="2">
-                                <path stroke-linecap="round" stroke-linejoin="round" d="M19 11H5m14 0a2 2 0 012 2v6a2 2 0 01-2 2H5a2 2 0 01-2-2v-6a2 2 0 012-2m14 0V9a2 2 0 00-2-2M5 11V9a2 2 0 012-2m0 0V5a2 2 0 012-2h6a2 2 0 012 2v2M7 7h10" />
-                            </svg>
-                        </button>
-                    </div>
-                `;
-                
-                const playBtn = trackCard.querySelector('.play-btn');
-                const addQueueBtn = trackCard.querySelector('.add-queue-btn');
-                const addToPlaylistBtn = trackCard.querySelector('.add-to-playlist-btn');
-
-                playBtn.addEventListener('click', (e) => {
-                    e.stopPropagation();
-                    playTrack(track, false);
-                });
-
-                addQueueBtn.addEventListener('click', (e) => {
-                    e.stopPropagation();
-                    addToQueue(track);
-                });
-
-                addToPlaylistBtn.addEventListener('click', (e) => {
-                    e.stopPropagation();
-                    openAddToPlaylistModal(track);
-                });
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let count = 0;
+
+            const handleLine = (line) => {
+                if (!line.trim()) return;
+                if (count === 0) resultsList.innerHTML = ''; // Clear the spinner
+                renderTrackCard(JSON.parse(line));
+                count++;
+            };
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+            }
+            handleLine(buffer + decoder.decode());
 
-                resultsList.appendChild(trackCard);
-            });
+            if (count === 0) {
+                showNoResults();
+            }
 
         } catch (error) {
+            if (error.name === 'AbortError') return;
             console.error('Search failed:', error);
             resultsList.innerHTML = `
                 <div class="text-center py-12">
@@ -571,17 +613,39 @@ document.addEventListener('DOMContentLoaded', () => {
         player.innerHTML = '<source src="" type="audio/mpeg">';
         
         try {
-            const response = await fetch(
-                `${window.location.origin}/api/music/stream?source=${track.source}&id=${encodeURIComponent(track.id)}`
-            );
-            const data = await response.json();
+            // Use a stream URL prefetched for the queue if it's still valid
+            let data = prefetchedStreams.get(track.id);
+            prefetchedStreams.delete(track.id);
+            if (!data || data.expires_at - 60 < Date.now() / 1000) {
+                const response = await fetch(
+                    `${window.location.origin}/api/music/stream?source=${track.source}&id=${encodeURIComponent(track.id)}`
+                );
+                data = await response.json();
+            }
 
             if (data.error) {
                 throw new Error(data.error);
             }
 
-            player.src = data.stream_url;
+            // audio_url is the local caching proxy, when the server has it on
+            player.src = data.audio_url || data.stream_url;
             player.play();
+            prefetchQueue();
+
+            // Fast search results can lack duration/thumbnail; fill them in
+            // from the resolve now that we have them
+            if (!track.duration && data.duration) {
+                track.duration = data.duration;
+            }
+            if (!track.image && data.image) {
+                track.image = data.image;
+                playerTrackImage.src = data.image;
+            }
+            try {
+                localStorage.setItem('heimdall-music-current-track', JSON.stringify(track));
+            } catch (e) {
+                console.error('Failed to save current track:', e);
+            }
 
             // If lyrics panel is open, refresh them
             if (!lyricsPanel.classList.contains('hidden')) {
@@ -606,6 +670,35 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Resolve stream URLs for the next few queue entries in one batch request
+    // so the following track change doesn't wait for extraction
+    async function prefetchQueue() {
+        const now = Date.now() / 1000;
+        const ids = musicQueue.slice(0, PREFETCH_COUNT)
+            .filter(t => t.source === 'youtube')
+            .filter(t => {
+                const cached = prefetchedStreams.get(t.id);
+                return !cached || cached.expires_at - 60 < now;
+            })
+            .map(t => t.id);
+        if (ids.length === 0) return;
+
+        try {
+            const response = await fetch(`${window.location.origin}/api/music/stream/batch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ source: 'youtube', ids })
+            });
+            if (!response.ok) return;
+            const data = await response.json();
+            Object.entries(data.results || {}).forEach(([id, stream]) => {
+                prefetchedStreams.set(id, stream);
+            });
+        } catch (error) {
+            console.error('Queue prefetch failed:', error);
+        }
+    }
+
     function addToQueue(track) {
         // Check if already in queue
         const exists = musicQueue.some(t => t.id === track.id);
@@ -618,6 +711,7 @@ document.addEventListener('DOMContentLoaded', () => {
         saveQueue();
         updateQueueUI();
         showNotification('Added to queue', 'success');
+        if (currentTrack) prefetchQueue();
 
         // If nothing is playing and this is the first song, play it
         if (!currentTrack && musicQueue.length === 1) {
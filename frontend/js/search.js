@@ -14,7 +14,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // (Ideally, this would be in a shared utils.js file)
     const createMediaCard = (item, mediaType) => {
         if (!item.poster_path) return ''; 
-        const posterUrl = `https://image.tmdb.org/t/p/w500${item.poster_path}`;
+        const posterUrl = `/img/w500${item.poster_path}`;
         // Link to details page instead of direct player
         const detailsUrl = `/details/${mediaType}/${item.id}`; 
         const title = item.title || item.name; 
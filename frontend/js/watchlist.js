@@ -21,7 +21,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function createWatchlistCard(item) {
         const mediaType = item.media_type || item.type;
         const posterUrl = item.poster_path 
-            ? `https://image.tmdb.org/t/p/w500${item.poster_path}`
+            ? `/img/w500${item.poster_path}`
             : 'https://placehold.co/200x300/1a1d23/e50914?text=No+Poster';
         const detailsUrl = `/details/${mediaType}/${item.id}`;
         const title = item.title || item.name;
@@ -11,6 +11,7 @@ import socket
 import webbrowser
 import os
 import sys
+import multiprocessing
 
 
 def find_free_port(default_port=8000):
@@ -89,7 +90,9 @@ def main():
     os.chdir(script_dir)
 
     # Import the Flask app object directly from the backend.app module.
-    from backend.app import app as flask_app
+    from backend import startup
+    from backend.app import app as flask_app, start_background_init, SERVER_THREADS
+    start_background_init()
 
     # If running from PyInstaller bundle, ensure the app uses the extracted frontend
     if getattr(sys, 'frozen', False):
@@ -101,6 +104,17 @@ def main():
             flask_app.static_url_path = ''
 
     def run_server():
+        # Prefer the ASGI stack: upstream-bound API routes run as coroutines
+        # under uvicorn. HEIMDALL_SERVER=waitress forces the WSGI server.
+        if os.environ.get('HEIMDALL_SERVER', 'asgi') != 'waitress':
+            try:
+                from backend.asgi import serve as serve_asgi
+            except ImportError as e:
+                print(f'ASGI stack not available ({e}), using waitress')
+            else:
+                serve_asgi(host='127.0.0.1', port=port)
+                return
+
         # Use waitress for a production-ready server on Windows
         try:
             from waitress import serve
@@ -110,7 +124,7 @@ def main():
             flask_app.run(host='127.0.0.1', port=port)
             return
 
-        serve(flask_app, host='127.0.0.1', port=port)
+        serve(flask_app, host='127.0.0.1', port=port, threads=SERVER_THREADS)
 
     t = threading.Thread(target=run_server, daemon=True)
     t.start()
@@ -120,6 +134,9 @@ def main():
     url = f'http://{host}:{port}/'
 
     if started:
+        startup.mark('listening')
+        startup.warm_in_background()
+        print(startup.summary())
         print(f'Application running at {url}')
         # Only open the default browser when explicitly requested via
         # environment variable OPEN_BROWSER (useful for local testing).
@@ -146,4 +163,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Needed for the yt-dlp worker processes in a PyInstaller build
+    multiprocessing.freeze_support()
     main()
@@ -28,6 +28,9 @@ pip install -r requirements.txt
 cd ..
 echo.
 
+REM Pick up frontend edits without restarting (static files are cached in memory)
+set HEIMDALL_STATIC_RELOAD=1
+
 echo Starting Heimdall in development mode...
 echo Press Ctrl+C to stop the application
 echo.